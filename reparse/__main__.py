@@ -0,0 +1,135 @@
+""" Parse files (or stdin) from the command line, writing JSON lines.
+
+Every input line gives one JSON object, in input order:
+``{"file": ..., "line": ..., "result": ...}``. Gzipped input is
+decompressed on the fly. With ``--workers`` lines are parsed in batches by
+a pool of processes; the output doesn't change, only its speed.
+
+Example Usage::
+
+    python -m reparse expressions.yaml patterns.yaml my.functions access.log.gz
+    zcat *.gz | python -m reparse expressions.yaml patterns.yaml my.functions \\
+        --parser-type alt_parser --workers 4 --matches-only > results.jsonl
+"""
+import argparse
+import collections
+import gzip
+import importlib
+import io
+import json
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import reparse
+from reparse.server import dumps_result
+from reparse.threads import iter_batches
+
+default_batch_size = 2048
+parser_types = ['basic_parser', 'combined_parser', 'alt_parser']
+
+# The parse function a worker process was started with
+_worker_parse = None
+_worker_matches_only = False
+
+
+def open_input(path, encoding='utf-8'):
+    """ Lines of the file at ``path`` (stdin for ``-``), gunzipped if it's gzip. """
+    f = sys.stdin.buffer if path == '-' else open(path, 'rb')
+    if not hasattr(f, 'peek'):
+        f = io.BufferedReader(f)
+    if f.peek(2)[:2] == b'\x1f\x8b':
+        f = gzip.GzipFile(fileobj=f)
+    return io.TextIOWrapper(f, encoding=encoding)
+
+
+def numbered_lines(paths, encoding='utf-8'):
+    """ ``(path, line number, line)`` for every line of the files at ``paths``. """
+    for path in paths:
+        with open_input(path, encoding) as f:
+            for number, line in enumerate(f, 1):
+                yield path, number, line.rstrip('\n')
+
+
+def parse_batch(parse, batch, matches_only=False):
+    """ The JSON lines of a batch of ``numbered_lines``. """
+    output = []
+    for path, number, line in batch:
+        result = parse(line)
+        if matches_only and not result:
+            continue
+        output.append('{{"file": {}, "line": {}, "result": {}}}\n'.format(
+            json.dumps(path), number, dumps_result(result)
+        ))
+    return output
+
+
+def _init_worker(parse, matches_only):
+    global _worker_parse, _worker_matches_only
+    _worker_parse = parse
+    _worker_matches_only = matches_only
+
+
+def _parse_in_worker(batch):
+    return parse_batch(_worker_parse, batch, _worker_matches_only)
+
+
+def parse_parallel(parse, batches, workers, matches_only=False):
+    """ ``parse_batch`` of every batch, in order, by ``workers`` processes.
+
+    At most two batches per worker are in flight, so input is read only as
+    fast as it's parsed. Workers are started as in
+    ``reparse.parallel.parse_file_parallel``.
+    """
+    context = None
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    pending = collections.deque()
+    with ProcessPoolExecutor(workers, context, _init_worker, (parse, matches_only)) as pool:
+        for batch in batches:
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+            pending.append(pool.submit(_parse_in_worker, batch))
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(argv=None, stdout=None):
+    arguments = argparse.ArgumentParser(prog='python -m reparse', description=__doc__.split('\n\n')[0].strip())
+    arguments.add_argument('expressions', help="expressions YAML")
+    arguments.add_argument('patterns', help="patterns YAML")
+    arguments.add_argument('functions', help="module with the parsing functions (as its ``functions``)")
+    arguments.add_argument('files', nargs='*', default=['-'], help="files to parse, gzipped or not; stdin by default")
+    arguments.add_argument('--parser-type', default='basic_parser', choices=parser_types)
+    arguments.add_argument('--engine', help="regex engine (see reparse.engines)")
+    arguments.add_argument('--cache-dir', help="cache built patterns here (see reparse.cache)")
+    arguments.add_argument('--workers', type=int, default=0, help="worker processes, none by default")
+    arguments.add_argument('--batch-size', type=int, default=default_batch_size, help="lines per batch of a worker")
+    arguments.add_argument('--encoding', default='utf-8')
+    arguments.add_argument('--matches-only', action='store_true', help="leave out lines without results")
+    arguments.add_argument('--output', help="write here instead of stdout")
+    args = arguments.parse_args(argv)
+
+    parse = reparse.parser(
+        parser_type=getattr(reparse, args.parser_type), expressions_yaml_path=args.expressions,
+        patterns_yaml_path=args.patterns, functions=importlib.import_module(args.functions).functions,
+        engine=args.engine, cache_dir=args.cache_dir, eager=True,
+    )
+    batches = iter_batches(numbered_lines(args.files, args.encoding), args.batch_size)
+    if args.workers:
+        outputs = parse_parallel(parse, batches, args.workers, args.matches_only)
+    else:
+        outputs = (parse_batch(parse, batch, args.matches_only) for batch in batches)
+
+    out = open(args.output, 'w') if args.output else (stdout or sys.stdout)
+    try:
+        for output in outputs:
+            out.writelines(output)
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
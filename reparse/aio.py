@@ -0,0 +1,79 @@
+""" Parsing in asyncio programs.
+
+Running a parser inline blocks the event loop for as long as a line takes.
+``parse_stream`` reads lines from an ``asyncio.StreamReader`` or any async
+iterable, parses them in batches on an executor and yields the results as
+an async generator, in order. At most ``max_in_flight`` batches are parsed
+at once; past that, reading waits for the oldest batch, so a fast producer
+can't pile up unparsed lines in memory.
+
+Example Usage::
+
+    parse = reparse.parser(...)
+    async for result in parse_stream(parse, reader):
+        ...
+
+The default executor runs batches in threads, which keeps the event loop
+free; with the ``'regex-concurrent'`` engine their matching also overlaps
+(see ``reparse.threads``). A ``ProcessPoolExecutor`` parses on other cores,
+the parser is then pickled along with every batch (see
+``reparse.PicklableParser``).
+"""
+import asyncio
+import collections
+import functools
+
+from reparse.threads import parse_batch
+
+default_batch_size = 256
+default_max_in_flight = 4
+
+
+async def _lines(source, encoding):
+    async for line in source:
+        if encoding is not None and isinstance(line, bytes):
+            line = line.decode(encoding)
+        yield line
+
+
+async def parse_stream(parse, source, executor=None, batch_size=default_batch_size,
+                       max_in_flight=default_max_in_flight, encoding='utf-8'):
+    """ Yield ``parse(line)`` for every line of ``source``, in order.
+
+    ``source`` is an ``asyncio.StreamReader`` or an async iterable of lines.
+    Bytes are decoded with ``encoding``, pass ``None`` to parse bytes with
+    bytes patterns. Lines keep their line endings, as with ``iter_lines``.
+
+    Lines are sent to ``executor`` (the loop's default one if ``None``) in
+    batches of ``batch_size``, a batch once it's full or ``source`` ends,
+    so use a small ``batch_size`` for sources that trickle in.
+
+    >>> async def lines():
+    ...     for line in ['a\\n', 'bb\\n', 'ccc']:
+    ...         yield line
+    >>> async def parse_all():
+    ...     return [result async for result in parse_stream(len, lines(), batch_size=2)]
+    >>> asyncio.run(parse_all())
+    [2, 3, 3]
+    """
+    loop = asyncio.get_running_loop()
+    pending = collections.deque()
+    batch = []
+    try:
+        async for line in _lines(source, encoding):
+            batch.append(line)
+            if len(batch) < batch_size:
+                continue
+            if len(pending) >= max_in_flight:
+                for result in await pending.popleft():
+                    yield result
+            pending.append(loop.run_in_executor(executor, functools.partial(parse_batch, parse, batch)))
+            batch = []
+        if batch:
+            pending.append(loop.run_in_executor(executor, functools.partial(parse_batch, parse, batch)))
+        while pending:
+            for result in await pending.popleft():
+                yield result
+    finally:
+        for future in pending:
+            future.cancel()
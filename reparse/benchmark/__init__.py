@@ -0,0 +1,14 @@
+""" Repeatable benchmarks of reparse parsers.
+
+Corpora are synthesized from the ``Matches``/``Non-Matches`` samples of the
+expressions (``reparse.benchmark.corpus``); throughput, latency percentiles
+and peak memory are measured for ``basic_parser``, ``alt_parser`` and
+``Parser`` (``reparse.benchmark.runner``) and saved as JSON, which later runs
+are compared against.
+
+Example Usage::
+
+    python -m reparse.benchmark --lines 20000 --output before.json
+    python -m reparse.benchmark --lines 20000 --compare before.json
+    python -m reparse.benchmark --parser my/expressions.yaml my/patterns.yaml my.functions
+"""
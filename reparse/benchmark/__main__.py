@@ -0,0 +1,50 @@
+import argparse
+import json
+import os
+import sys
+
+from reparse.benchmark import runner
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(prog='python -m reparse.benchmark', description="Benchmark reparse parsers.")
+    arguments.add_argument('--lines', type=int, default=10000, help="lines in each corpus")
+    arguments.add_argument('--density', type=float, default=0.5, help="share of lines containing a match")
+    arguments.add_argument('--seed', type=int, default=0)
+    arguments.add_argument('--parser', nargs=3, action='append', metavar=('EXPRESSIONS', 'PATTERNS', 'FUNCTIONS'),
+                           help="YAML paths and functions module of a parser to measure instead of the examples")
+    arguments.add_argument('--output', help="save the results as JSON")
+    arguments.add_argument('--compare', metavar='BASELINE', help="JSON of an earlier run to check for regressions")
+    arguments.add_argument('--tolerance', type=float, default=0.1, help="allowed slowdown, as a fraction")
+    args = arguments.parse_args(argv)
+
+    targets = runner.examples
+    if args.parser:
+        targets = [
+            (os.path.basename(os.path.dirname(os.path.abspath(expressions))) or expressions, expressions, patterns,
+             functions)
+            for expressions, patterns, functions in args.parser
+        ]
+    report = runner.run(targets, args.lines, args.density, args.seed)
+
+    for name, kinds in sorted(report['results'].items()):
+        for kind, metrics in sorted(kinds.items()):
+            print('{:<12} {:<13} {:>10.0f} lines/s  {}  peak {:.1f} KiB'.format(
+                name, kind, metrics['lines_per_second'],
+                '  '.join('{} {:.1f}us'.format(key, value) for key, value in sorted(metrics['latency'].items())),
+                metrics['peak_memory'] / 1024.0,
+            ))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = runner.compare(json.load(f), report, args.tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
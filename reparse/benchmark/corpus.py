@@ -0,0 +1,157 @@
+""" Corpora synthesized from the ``Matches`` and ``Non-Matches`` samples of expressions.
+
+Lines are filler words with, for a ``density`` share of them, a matching
+sample somewhere in between: an expression's ``Matches`` sample or a whole
+pattern made of them. The other lines get a ``Non-Matches`` sample or only
+filler. Generation is seeded, so a corpus can be made again exactly.
+"""
+import random
+
+from reparse.builders import build_all
+from reparse.engines import get_engine
+from reparse.util import separate_string, sre_parse
+
+filler_words = "the a service request user id status ok retry took queue worker sent to from".split()
+
+_categories = {
+    'CATEGORY_DIGIT': '1', 'CATEGORY_SPACE': ' ', 'CATEGORY_WORD': 'a',
+    'CATEGORY_NOT_DIGIT': 'a', 'CATEGORY_NOT_SPACE': 'a', 'CATEGORY_NOT_WORD': ' ',
+}
+
+
+def expression_samples(expressions, field='Matches'):
+    """ ``{type: [sample, ...]}`` from the ``field`` of every expression.
+
+    >>> expression_samples({'Number': {'Digits': {'Expression': r'\\d+', 'Matches': '1 | 22'}}})
+    {'Number': ['1', '22']}
+    """
+    output = {}
+    for expression_type, type_expressions in expressions.items():
+        for expression in type_expressions.values():
+            for sample in str(expression.get(field) or '').split('|'):
+                if sample.strip():
+                    output.setdefault(expression_type, []).append(sample.strip())
+    return output
+
+
+def example_string(regex, flags=0, rng=None):
+    """ A short string matching ``regex``, or ``None`` if the regex is beyond
+    this little generator (negated sets, backreferences...). Repeats are
+    taken as few times as possible, or with ``rng`` (a ``random.Random``)
+    sometimes once more.
+
+    >>> example_string(r'Fax: \\s? (\\d{3}) [-.]', get_engine().re_flags)
+    'Fax:111-'
+    """
+    try:
+        return _example(sre_parse.parse(regex, flags), rng)
+    except Exception:
+        return None
+
+
+def _example(parsed, rng):
+    output = []
+    for op, av in parsed:
+        name = str(op)
+        if name == 'LITERAL':
+            output.append(chr(av))
+        elif name == 'NOT_LITERAL':
+            output.append('x' if chr(av) != 'x' else 'y')
+        elif name == 'ANY':
+            output.append('x')
+        elif name == 'IN':
+            output.append(_in(av))
+        elif name == 'CATEGORY':
+            output.append(_categories[str(av)])
+        elif name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT'):
+            count = av[0]
+            if rng is not None and av[1] > count:
+                count += rng.randint(0, 1)
+            output.append(_example(av[2], rng) * count)
+        elif name in ('SUBPATTERN', 'ATOMIC_GROUP'):
+            output.append(_example(av[-1], rng))
+        elif name == 'BRANCH':
+            output.append(_example(av[1][0], rng))
+        elif name in ('AT', 'ASSERT', 'ASSERT_NOT'):
+            continue
+        else:
+            raise ValueError("Can't generate {}".format(name))
+    return ''.join(output)
+
+
+def _in(items):
+    op, av = items[0]
+    name = str(op)
+    if name == 'LITERAL':
+        return chr(av)
+    if name == 'RANGE':
+        return chr(av[0])
+    if name == 'CATEGORY':
+        return _categories[str(av)]
+    raise ValueError("Can't generate {}".format(name))
+
+
+def pattern_samples(patterns, expressions, variants=20, seed=0, engine=None):
+    """ ``{pattern: [sample, ...]}``: each pattern's ``<Type>`` parts filled
+    in with ``Matches`` samples, checked against the built pattern.
+    """
+    rng = random.Random(seed)
+    engine = get_engine(engine)
+    built = dict((pattern.name, pattern) for pattern in build_all(patterns, expressions, {}, engine.name))
+    matches = expression_samples(expressions)
+
+    def sample(name, depth=0):
+        if name in matches and (name not in patterns or rng.random() < 0.5):
+            return rng.choice(matches[name])
+        if name not in patterns or depth > 10:
+            return None
+        inbetweens, types = separate_string(patterns[name]['Pattern'])
+        parts = [example_string(inbetweens[0], engine.re_flags, rng)]
+        for type_name, inbetween in zip(types, inbetweens[1:]):
+            parts.append(sample(type_name, depth + 1))
+            parts.append(example_string(inbetween, engine.re_flags, rng))
+        if None in parts:
+            return None
+        return ''.join(parts).strip()
+
+    output = {}
+    for name, pattern in built.items():
+        found = set()
+        for _ in range(variants):
+            text = sample(name)
+            if text is None:
+                text = example_string(pattern.regex, engine.re_flags, rng)
+            if text and pattern.pattern.search(text):
+                found.add(text)
+        output[name] = sorted(found)
+    return output
+
+
+def generate(expressions, patterns=None, lines=10000, density=0.5, seed=0, engine=None):
+    """ ``lines`` lines, about ``density`` of which contain a match.
+
+    >>> expressions = {'Number': {'Digits': {'Expression': r'\\d+', 'Matches': '12', 'Non-Matches': 'x'}}}
+    >>> corpus = generate(expressions, lines=100, density=0.3, seed=1)
+    >>> len(corpus), 20 < sum('12' in line for line in corpus) < 40
+    (100, True)
+    >>> corpus == generate(expressions, lines=100, density=0.3, seed=1)
+    True
+    """
+    rng = random.Random(seed)
+    matching = sorted(set(sample for values in expression_samples(expressions).values() for sample in values))
+    if patterns:
+        matching += sorted(set(
+            sample for values in pattern_samples(patterns, expressions, seed=seed, engine=engine).values()
+            for sample in values
+        ))
+    not_matching = sorted(set(
+        sample for values in expression_samples(expressions, 'Non-Matches').values() for sample in values
+    ))
+    output = []
+    for _ in range(lines):
+        words = [rng.choice(filler_words) for _ in range(rng.randint(3, 10))]
+        pool = matching if rng.random() < density else not_matching
+        if pool:
+            words.insert(rng.randint(0, len(words)), rng.choice(pool))
+        output.append(' '.join(words))
+    return output
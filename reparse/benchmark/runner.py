@@ -0,0 +1,148 @@
+""" Measures parsers over a corpus and compares the results of two runs.
+
+A target is a parser description: ``(name, expressions.yaml, patterns.yaml,
+functions module)``. Every target is measured as a ``basic_parser``, an
+``alt_parser`` and a ``Parser`` of its expressions, each on the same corpus:
+
+- ``lines_per_second``: throughput over the corpus
+- ``latency``: per line percentiles, in microseconds
+- ``peak_memory``: peak bytes allocated while building and running the
+  parser (measured in a separate pass, ``tracemalloc`` slows things down)
+"""
+import importlib
+import os
+import platform
+import time
+import tracemalloc
+
+import yaml
+
+import reparse
+from reparse.benchmark.corpus import generate
+
+examples_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'examples')
+examples = [
+    (name, os.path.join(examples_dir, name, 'expressions.yaml'), os.path.join(examples_dir, name, 'patterns.yaml'),
+     'examples.{}.functions'.format(name))
+    for name in ('phone', 'colortime')
+]
+percentiles = (50, 90, 99)
+
+
+def percentile(ordered, q):
+    """ The ``q``-th percentile of a sorted list (nearest rank).
+
+    >>> percentile([1, 2, 3, 4], 50), percentile([1, 2, 3, 4], 99)
+    (2, 4)
+    """
+    if not ordered:
+        return 0
+    rank = max(1, int(round(q / 100.0 * len(ordered) + 0.5 - 1e-9)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def measure(build, lines):
+    """ Metrics of the parse function ``build()`` returns over ``lines``. """
+    parse = build()
+    clock = time.perf_counter
+    latencies = []
+    for line in lines:
+        start = clock()
+        parse(line)
+        latencies.append(clock() - start)
+    total = sum(latencies)
+    latencies.sort()
+
+    tracemalloc.start()
+    try:
+        parse = build()
+        for line in lines:
+            parse(line)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'lines_per_second': len(lines) / total if total else 0.0,
+        'latency': dict(('p{}'.format(q), percentile(latencies, q) * 1e6) for q in percentiles),
+        'peak_memory': peak,
+    }
+
+
+def _groups(*groups):
+    return groups
+
+
+def builders(expressions_yaml_path, patterns_yaml_path, functions):
+    """ ``{kind: build}`` for the parsers measured for one target. """
+    def pattern_parser(parser_type):
+        return lambda: reparse.parser(
+            parser_type=parser_type, functions=functions,
+            expressions_yaml_path=expressions_yaml_path, patterns_yaml_path=patterns_yaml_path,
+        )
+
+    def expression_parser():
+        with open(expressions_yaml_path) as f:
+            expressions = yaml.safe_load(f)
+        return reparse.Parser(*[
+            reparse.SimpleExpression(name, expression['Expression'], _groups, flags=None)
+            for type_expressions in expressions.values() for name, expression in type_expressions.items()
+        ]).line
+
+    return {
+        'basic_parser': pattern_parser(reparse.basic_parser),
+        'alt_parser': pattern_parser(reparse.alt_parser),
+        'Parser': expression_parser,
+    }
+
+
+def run(targets=examples, lines=10000, density=0.5, seed=0):
+    """ Measure every target; returns the JSON-able report. """
+    report = {
+        'reparse': reparse.__version__,
+        'python': platform.python_version(),
+        'lines': lines,
+        'density': density,
+        'seed': seed,
+        'results': {},
+    }
+    for name, expressions_yaml_path, patterns_yaml_path, functions_module in targets:
+        with open(expressions_yaml_path) as f:
+            expressions = yaml.safe_load(f)
+        with open(patterns_yaml_path) as f:
+            patterns = yaml.safe_load(f)
+        corpus = generate(expressions, patterns, lines, density, seed)
+        functions = importlib.import_module(functions_module).functions
+        report['results'][name] = dict(
+            (kind, measure(build, corpus))
+            for kind, build in builders(expressions_yaml_path, patterns_yaml_path, functions).items()
+        )
+    return report
+
+
+def compare(baseline, current, tolerance=0.1):
+    """ Regressions of ``current`` against ``baseline`` beyond ``tolerance``
+    (a fraction), as readable lines.
+
+    >>> old = {'results': {'phone': {'Parser': {'lines_per_second': 100.0, 'latency': {'p99': 10.0}}}}}
+    >>> new = {'results': {'phone': {'Parser': {'lines_per_second': 80.0, 'latency': {'p99': 10.5}}}}}
+    >>> compare(old, new)
+    ['phone Parser: lines_per_second 100 -> 80 (-20.0%)']
+    """
+    regressions = []
+    for name, kinds in sorted(current['results'].items()):
+        for kind, metrics in sorted(kinds.items()):
+            old = baseline['results'].get(name, {}).get(kind)
+            if old is None:
+                continue
+            checks = [('lines_per_second', old['lines_per_second'], metrics['lines_per_second'], -1)]
+            checks += [
+                (key, old['latency'][key], value, 1)
+                for key, value in sorted(metrics['latency'].items()) if key in old['latency']
+            ]
+            for key, before, after, worse in checks:
+                if before and (after - before) / before * worse > tolerance:
+                    regressions.append('{} {}: {} {:.0f} -> {:.0f} ({:+.1f}%)'.format(
+                        name, kind, key, before, after, (after - before) / before * 100
+                    ))
+    return regressions
@@ -1,5 +1,9 @@
-from reparse.config import pattern_max_recursion_depth
+import functools
+
+from reparse.engines import get_engine
 from reparse.expression import Group, AlternatesGroup, Expression
+from reparse.optimize import eliminate_dead_captures, optimize_alternation
+from reparse.plan import Plan
 from reparse.util import separate_string
 
 
@@ -7,6 +11,48 @@ class ExpressionGroupNotFound(Exception):
     pass
 
 
+class CyclicPatternError(ExpressionGroupNotFound):
+    """ Patterns that contain each other, directly or through others. """
+
+
+# The functions ``Function_Builder`` makes are partials of these rather than
+# closures, so built patterns can be pickled: user functions go by their
+# importable names, and the rest is which of these wraps them.
+
+def _type_function(function, _):
+    if not any(_):
+        return None
+    return function(_)
+
+
+def _group_function(function, _):
+    return function(_[0])
+
+
+def _expression_function(function, group_names, _):
+    return function(**dict(zip(group_names, _)))
+
+
+def _pattern_function(function, _):
+    return function(*_)
+
+
+def _default_group_function(_):
+    if _:
+        return _[0]
+
+
+def _default_type_function(_):
+    for i in _:
+        if i is not None:
+            return i
+
+
+def _default_function(_):
+    if any(_):
+        return _
+
+
 class Function_Builder(object):
     """
     Function Builder is an on-the-fly builder of functions for expressions
@@ -16,50 +62,52 @@ class Function_Builder(object):
     >>> fb = Function_Builder({"hey":t})
     >>> fb.get_function("hey", "") is t
     True
+
+    Asking twice for the same function gives the same function back.
     """
 
     def __init__(self, functions_dict):
         self._functions = functions_dict
+        self._built = {}
 
     def get_function(self, name, function_type, group_names=None):
+        key = (name, function_type, None if group_names is None else tuple(group_names))
+        if key not in self._built:
+            self._built[key] = self._new_function(name, function_type, group_names)
+        return self._built[key]
+
+    def _new_function(self, name, function_type, group_names):
         if name in self._functions:
-            if function_type is "type":
-                def func(_):
-                    if not any(_):
-                        return None
-                    return self._functions[name](_)
-            elif function_type is "group":
-                def func(_):
-                    return self._functions[name](_[0])
-            elif function_type is "expression" and group_names is not None:
-                def func(_):
-                    groups = dict(zip(group_names, _))
-                    return self._functions[name](**groups)
-            elif function_type is "pattern":
-                def func(_):
-                    return self._functions[name](*_)
+            function = self._functions[name]
+            if function_type == "type":
+                func = functools.partial(_type_function, function)
+            elif function_type == "group":
+                func = functools.partial(_group_function, function)
+            elif function_type == "expression" and group_names is not None:
+                func = functools.partial(_expression_function, function, list(group_names))
+                # a group named again later is overwritten by it
+                unused = [i for i, group in enumerate(group_names) if group in group_names[i + 1:]]
+                if unused:
+                    func.unused_arguments = frozenset(unused)
+            elif function_type == "pattern":
+                func = functools.partial(_pattern_function, function)
             else:
-                func = self._functions[name]
+                func = function
 
         # DEFAULT FUNCTIONS
-        elif function_type is "group":
-            def func(_):
-                if _:
-                    return _[0]
-        elif function_type is "type":
-            def func(_):
-                for i in _:
-                    if i is not None:
-                        return i
+        elif function_type == "group":
+            func = functools.partial(_default_group_function)
+            func.pure = True
+        elif function_type == "type":
+            func = functools.partial(_default_type_function)
         else:
-            def func(_):
-                if any(_):
-                    return _
+            func = functools.partial(_default_function)
         func.__name__ = name
         return func
 
     def add_function(self, name, function):
         self._functions[name] = function
+        self._built.clear()
 
 
 class Expression_Builder(object):
@@ -80,22 +128,29 @@ class Expression_Builder(object):
     [[('hey',), ('',)], [('',), ('cool',)]]
     """
 
-    def __init__(self, expressions_dict, function_builder):
+    def __init__(self, expressions_dict, function_builder, engine=None):
         self.type_db = {}
+        self.engine = engine
+        flags = get_engine(engine).re_flags
+        # identical expressions (in several types) are built once
+        interned = {}
 
         for expression_type, expressions in expressions_dict.items():
             type_expressions = []
             for name, expression in expressions.items():
                 groups = expression['Groups']
                 regex = expression['Expression']
-                lengths = [1] * len(groups)
-                group_functions = [function_builder.get_function(g, "group") for g in groups]
-                expression_final_function = \
-                    function_builder.get_function(name, function_type="expression", group_names=groups)
-                e = Expression(regex, group_functions, lengths, expression_final_function)
-                type_expressions.append(e)
+                key = (regex, name, tuple(groups))
+                if key not in interned:
+                    lengths = [1] * len(groups)
+                    group_functions = [function_builder.get_function(g, "group") for g in groups]
+                    expression_final_function = \
+                        function_builder.get_function(name, function_type="expression", group_names=groups)
+                    interned[key] = Expression(optimize_alternation(regex, flags), group_functions, lengths,
+                                               expression_final_function, engine=engine)
+                type_expressions.append(interned[key])
             type_final_function = function_builder.get_function(expression_type, function_type="type")
-            self.type_db[expression_type] = AlternatesGroup(type_expressions, type_final_function)
+            self.type_db[expression_type] = AlternatesGroup(type_expressions, type_final_function, engine=engine)
 
     def get_type(self, type_string):
         if type_string in self.type_db:
@@ -114,27 +169,93 @@ def build_pattern(pattern_name, pattern_regex, expression_builder, function_buil
         if expression is None:
             raise ExpressionGroupNotFound("Expression Group ({}) not Found!".format(name))
         expressions.append(expression)
-    return Group(expressions, final_function, inbetweens, pattern_name)
+    return Group(expressions, final_function, inbetweens, pattern_name, expression_builder.engine)
 
 
-def _build(output_patterns, patterns_dict, expression_builder, function_builder, depth=0):
-    extra = {}
+def pattern_dependencies(patterns_dict, expression_builder):
+    """ ``{pattern name: [names of the patterns it contains]}``.
+
+    ``<Name>`` references to expression types aren't dependencies; types are
+    looked up first, just like ``build_pattern`` does.
+
+    >>> eb = Expression_Builder({'Number': {}}, Function_Builder({}))
+    >>> pattern_dependencies({'A': {'Pattern': '<Number> <B>'}, 'B': {'Pattern': '<Number>'}}, eb)
+    {'A': ['B'], 'B': []}
+    """
+    dependencies = {}
     for name, pattern in patterns_dict.items():
-        try:
-            pat = build_pattern(name, pattern['Pattern'], expression_builder, function_builder)
-            pat.order = int(pattern.get('Order', 0))
-            output_patterns.append(pat)
-            expression_builder.add_type(pat, name)
-        except ExpressionGroupNotFound:
-            extra[name] = pattern
-    if len(extra) > 0 and depth < pattern_max_recursion_depth:
-        # Recursive building for patterns inside of patterns
-        return _build(output_patterns, extra, expression_builder, function_builder, depth + 1)
-    elif depth >= pattern_max_recursion_depth:
-        raise ExpressionGroupNotFound()
+        dependencies[name] = []
+        for reference in separate_string(pattern['Pattern'])[1]:
+            if expression_builder.get_type(reference) is not None:
+                continue
+            if reference not in patterns_dict:
+                raise ExpressionGroupNotFound(
+                    "Expression Group ({}) not Found! (in pattern [{}])".format(reference, name)
+                )
+            dependencies[name].append(reference)
+    return dependencies
+
+
+def build_order(names, dependencies):
+    """ ``names`` in an order where every pattern comes after the ones it
+    contains.
+
+    That order is the one repeated passes over ``names`` would build them
+    in: first every pattern whose dependencies come before it, in order,
+    then the ones that had to wait for a pattern later in the list, and so
+    on. Patterns that contain each other raise ``CyclicPatternError``.
+
+    >>> build_order(['a', 'b', 'c'], {'a': ['c'], 'b': [], 'c': []})
+    ['b', 'c', 'a']
+    >>> build_order(['a', 'b'], {'a': ['b'], 'b': ['a']})
+    Traceback (most recent call last):
+     ...
+    reparse.builders.CyclicPatternError: Patterns contain each other: a -> b -> a
+    """
+    position = dict((name, i) for i, name in enumerate(names))
+    passes = {}
+    for root in names:
+        if root in passes:
+            continue
+        # depth first, without recursion: chains of patterns can be long
+        path = [root]
+        stack = [iter(dependencies[root])]
+        while stack:
+            for child in stack[-1]:
+                if child in passes:
+                    continue
+                if child in path:
+                    cycle = path[path.index(child):] + [child]
+                    raise CyclicPatternError("Patterns contain each other: {}".format(" -> ".join(cycle)))
+                path.append(child)
+                stack.append(iter(dependencies[child]))
+                break
+            else:
+                stack.pop()
+                name = path.pop()
+                passes[name] = max(
+                    [passes[d] + (position[d] > position[name]) for d in dependencies[name]] or [0]
+                )
+    return sorted(names, key=lambda name: (passes[name], position[name]))
+
+
+def _build(patterns_dict, expression_builder, function_builder):
+    names = list(patterns_dict)
+    output_patterns = []
+    for name in build_order(names, pattern_dependencies(patterns_dict, expression_builder)):
+        pattern = patterns_dict[name]
+        pat = build_pattern(name, pattern['Pattern'], expression_builder, function_builder)
+        pat.order = int(pattern.get('Order', 0))
+        pat.plan = Plan(pat)
+        pat.before_compile = eliminate_dead_captures
+        output_patterns.append(pat)
+        expression_builder.add_type(pat, name)
     return output_patterns
 
 
-def build_all(patterns, expressions, functions):
+def build_all(patterns, expressions, functions, engine=None):
+    """ Build all ``patterns`` from ``expressions`` and ``functions``,
+    compiling with the regex ``engine`` (see ``reparse.engines``).
+    """
     function_builder = Function_Builder(functions)
-    return _build([], patterns, Expression_Builder(expressions, function_builder), function_builder)
+    return _build(patterns, Expression_Builder(expressions, function_builder, engine), function_builder)
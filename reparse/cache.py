@@ -0,0 +1,137 @@
+""" On-disk cache of built patterns.
+
+Building a parser means loading YAML, validating it and building the
+expression tree of every pattern. The cache stores the result of that work,
+the regex and order of every pattern and the shape of every node (group
+lengths, or how a group joins its children) along with the names and kinds
+of the functions bound to it, as JSON keyed by a hash of the
+YAML contents and the reparse version. A warm start only reads that JSON
+and binds the functions by name again.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+from reparse.builders import Function_Builder
+from reparse.expression import Expression, Group
+from reparse.optimize import eliminate_dead_captures
+from reparse.plan import Plan
+
+# Bump when the format below changes
+cache_format = 2
+
+
+def cache_key(*sources):
+    """ Hash of the YAML (bytes or str) or already loaded dicts a parser is built from. """
+    from reparse import __version__
+    digest = hashlib.sha256()
+    digest.update('{}:{}'.format(cache_format, __version__).encode('utf-8'))
+    for source in sources:
+        if isinstance(source, dict):
+            source = json.dumps(source, sort_keys=True, default=repr)
+        if not isinstance(source, bytes):
+            source = source.encode('utf-8')
+        digest.update(hashlib.sha256(source).digest())
+    return digest.hexdigest()
+
+
+def dump_patterns(patterns):
+    """ Describe built patterns as JSON-able data. """
+    pattern_names = dict((id(pattern), pattern.name) for pattern in patterns)
+
+    def node(expression, final_type, top=False):
+        groups = []
+        for function in expression.group_functions:
+            child = getattr(function, '__self__', None)
+            if isinstance(child, Expression):
+                if id(child) in pattern_names:
+                    groups.append({'pattern': pattern_names[id(child)]})
+                elif final_type == 'pattern':
+                    groups.append(node(child, 'type'))
+                else:
+                    groups.append(node(child, 'expression'))
+            else:
+                groups.append([function.__name__, 'group'])
+        group_names = None
+        if final_type == 'expression':
+            group_names = [function.__name__ for function in expression.group_functions]
+        description = {
+            'final': [expression.final_function.__name__, final_type, group_names],
+            'groups': groups,
+        }
+        if expression._parts is not None and not top:
+            # keep the regex of a group lazy (see ``reparse.expression.Group``)
+            description['inbetweens'] = expression._parts[0]
+        else:
+            description['regex'] = expression.regex
+            description['lengths'] = expression.group_lengths
+        return description
+
+    return [
+        {
+            'name': pattern.name,
+            'order': pattern.order,
+            'node': node(pattern, 'pattern', top=True),
+        }
+        for pattern in patterns
+    ]
+
+
+def load_patterns(data, functions, engine=None):
+    """ Rebuild patterns described by ``dump_patterns``, binding ``functions``
+    by name and compiling with ``engine``.
+    """
+    function_builder = Function_Builder(functions)
+    built = {}
+
+    def node(description, name=""):
+        children = []
+        group_functions = []
+        for group in description['groups']:
+            if isinstance(group, dict) and 'pattern' in group:
+                children.append(built[group['pattern']])
+                group_functions.append(children[-1].run)
+            elif isinstance(group, dict):
+                children.append(node(group))
+                group_functions.append(children[-1].run)
+            else:
+                group_functions.append(function_builder.get_function(*group))
+        final_name, final_type, group_names = description['final']
+        final_function = function_builder.get_function(final_name, final_type, group_names)
+        if 'inbetweens' in description:
+            return Group(children, final_function, description['inbetweens'], name, engine)
+        return Expression(description['regex'], group_functions, description['lengths'], final_function, name, engine)
+
+    patterns = []
+    for item in data:
+        pattern = node(item['node'], item['name'])
+        pattern.order = item['order']
+        pattern.plan = Plan(pattern)
+        pattern.before_compile = eliminate_dead_captures
+        built[pattern.name] = pattern
+        patterns.append(pattern)
+    return patterns
+
+
+def load(cache_dir, key, functions, engine=None):
+    """ Cached patterns for ``key``, or ``None`` if there aren't any usable ones. """
+    try:
+        with open(os.path.join(cache_dir, key + '.json')) as f:
+            return load_patterns(json.load(f), functions, engine)
+    except (IOError, OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def store(cache_dir, key, patterns):
+    """ Write ``patterns`` to the cache, atomically so readers never see a partial file. """
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    fd, temporary = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(dump_patterns(patterns), f)
+        os.replace(temporary, os.path.join(cache_dir, key + '.json'))
+    except BaseException:
+        os.unlink(temporary)
+        raise
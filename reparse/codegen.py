@@ -0,0 +1,85 @@
+""" Generated Python for built patterns.
+
+``compile_pattern`` turns the plan of a built pattern (see ``reparse.plan``)
+into the source of one straight-line function: a statement per group,
+type, expression or pattern function, with the group indices written in.
+The functions ``Function_Builder`` resolved are called directly. The
+source is ``exec``'d and the resulting function replaces the pattern's
+plan, so ``Expression.run`` calls it instead of looping over steps.
+
+Slices are kept (``m[2:3]`` rather than ``m[2]``) because group functions
+take a sequence of groups, and short matches must slice to empty exactly
+like they did before.
+"""
+import itertools
+import linecache
+import weakref
+
+from reparse.plan import plan_of
+
+# numbers the generated sources, so patterns of the same name don't share one
+_sources = itertools.count()
+
+
+def pattern_source(pattern, function_name='run'):
+    """ Python source of ``pattern``'s plan, and the functions it calls
+    by name (``f0``, ``f1``, ...).
+
+    >>> from reparse.expression import Expression
+    >>> first = lambda g: g[0]
+    >>> inner = Expression('(a)(b)', [first, first], [1, 1], ''.join)
+    >>> outer = Expression('(x)(?:(a)(b))', [first, inner.run], [1, 2], tuple)
+    >>> source, functions = pattern_source(outer)
+    >>> print(source)
+    def run(m):
+        v0 = f0(m[0:1])
+        v1 = f1(m[1:2])
+        v2 = f2(m[2:3])
+        v3 = f3([v1, v2])
+        v4 = f4([v0, v3])
+        return v4
+    <BLANKLINE>
+    """
+    plan = plan_of(pattern)
+    lines = ['def {}(m):'.format(function_name)]
+    functions = {}
+    stack = []
+    for i, (function, start, end, arity) in enumerate(plan.steps):
+        functions['f{}'.format(i)] = function
+        if arity is None:
+            lines.append('    v{0} = f{0}(m[{1}:{2}])'.format(i, start, end))
+        else:
+            arguments = stack[len(stack) - arity:]
+            del stack[len(stack) - arity:]
+            lines.append('    v{} = f{}([{}])'.format(i, i, ', '.join(arguments)))
+        stack.append('v{}'.format(i))
+    lines.append('    return {}'.format(stack[0]))
+    return '\n'.join(lines) + '\n', functions
+
+
+def compile_pattern(pattern):
+    """ Generate, ``exec`` and return the function running ``pattern``. """
+    pattern.pattern  # settle the plan before generating code from it
+    plan = plan_of(pattern)
+    # The name is only in the filename: as an identifier it could be a
+    # keyword or one of the step functions
+    source, namespace = pattern_source(pattern)
+    filename = '<reparse pattern {} #{}>'.format(pattern.name, next(_sources))
+    # lets tracebacks show the generated line
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    exec(compile(source, filename, 'exec'), namespace)
+    run = namespace['run']
+    run.source = source
+    run.plan = plan
+    # linecache never drops entries without an mtime itself
+    weakref.finalize(run, linecache.cache.pop, filename, None)
+    return run
+
+
+def compile_patterns(patterns):
+    """ Run every pattern of ``patterns`` (as returned by ``build_all``)
+    through generated code. Returns ``patterns``.
+    """
+    for pattern in patterns:
+        pattern.plan = compile_pattern(pattern)
+    return patterns
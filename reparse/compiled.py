@@ -0,0 +1,72 @@
+""" Process-wide cache of compiled regexes.
+
+Expressions of the same type show up in many patterns, and services build
+many parsers from overlapping YAML. Every ``SimpleExpression`` compiles
+through ``pattern_cache``, so an identical regex is compiled (and held in
+memory) only once per process.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+from reparse.config import compiled_cache_size
+
+
+class PatternCache(object):
+    """ Compiled regexes keyed by ``(regex, flags, engine)``, holding at most
+    ``maxsize`` of them and evicting the least recently used one first.
+
+    >>> cache = PatternCache(maxsize=2)
+    >>> cache.compile('a') is cache.compile('a')
+    True
+    >>> _ = cache.compile('b'), cache.compile('c')
+    >>> cache.info()
+    {'hits': 1, 'misses': 3, 'evictions': 1, 'size': 2, 'maxsize': 2}
+    """
+
+    def __init__(self, maxsize=compiled_cache_size):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._patterns = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(self, regex, flags=0, engine=re):
+        """ ``engine.compile(regex, flags)``, from the cache when possible.
+        Compile errors are raised by the engine as usual.
+        """
+        key = (regex, flags, engine.__name__)
+        with self._lock:
+            pattern = self._patterns.get(key)
+            if pattern is not None:
+                self._patterns.move_to_end(key)
+                self.hits += 1
+                return pattern
+            self.misses += 1
+        pattern = engine.compile(regex, flags)
+        with self._lock:
+            self._patterns[key] = pattern
+            while len(self._patterns) > self.maxsize:
+                self._patterns.popitem(last=False)
+                self.evictions += 1
+        return pattern
+
+    def info(self):
+        """ Hit/miss statistics and the current size. """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._patterns),
+            'maxsize': self.maxsize,
+        }
+
+    def clear(self):
+        """ Drop every cached pattern and reset the statistics. """
+        with self._lock:
+            self._patterns.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+pattern_cache = PatternCache()
@@ -1,10 +1,28 @@
+import warnings
+
 import regex
 
-# This number should be bigger than the longest
-# chain of patterns-inside-patterns
-pattern_max_recursion_depth = 10
+# How many compiled regexes reparse.compiled.pattern_cache holds
+compiled_cache_size = 1024
+
+# How many lines a reparse.memo.LineCache holds by default
+line_cache_size = 4096
+
+# Expressions that are an alternation of at least this many plain words
+# are compiled as a prefix trie (see reparse.optimize)
+alternation_trie_threshold = 16
 
-# The regex engine and settings
+# The regex engine and settings (see reparse.engines)
+default_engine = 'regex'
 regex_flags = regex.VERBOSE | regex.IGNORECASE
 expression_compiler = lambda expression: regex.compile(expression, flags=regex_flags)
-expression_sub = lambda expression, sub, string: regex.sub(expression, sub, string, flags=regex_flags)
\ No newline at end of file
+expression_sub = lambda expression, sub, string: regex.sub(expression, sub, string, flags=regex_flags)
+
+
+def __getattr__(name):
+    # Patterns are built in dependency order (see reparse.builders.build_order),
+    # however deeply they nest, so there's no recursion depth to limit any more
+    if name == 'pattern_max_recursion_depth':
+        warnings.warn("pattern_max_recursion_depth is no longer used", DeprecationWarning, stacklevel=2)
+        return 10
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -0,0 +1,145 @@
+""" Regex engines.
+
+An engine is a module with ``re``'s API (``compile``, ``error``) together
+with the flags every regex is compiled with. Expressions, the tools and the
+parsers all compile through an engine, so a parser matches the same way
+wherever its regexes end up.
+
+Three engines are built in: ``'regex'`` (the default, see
+``reparse.config.default_engine``), the standard library's ``'re'`` and
+``'regex-concurrent'``, which is ``regex`` matching with the GIL released
+(``concurrent=True``) so threads can match in parallel (see
+``reparse.threads``). All compile the expressions built from YAML with
+``reparse.config.regex_flags``: whitespace in regexes is ignored and
+matching is case insensitive. Hand-written ``SimpleExpression`` instances
+keep their own flags, none by default. More engines can be added with
+``register_engine``.
+"""
+import re
+
+import regex
+
+from reparse import config
+from reparse.compiled import pattern_cache
+
+# Flags that mean the same thing to the standard library's regex parser
+_re_flags = re.IGNORECASE | re.VERBOSE | re.MULTILINE | re.DOTALL | re.ASCII | re.UNICODE
+
+
+class Engine(object):
+    """ A regex module and the flags to compile with.
+
+    >>> engine = Engine('plain', re)
+    >>> engine.compile('a b').findall('a b ab')
+    ['a b']
+    """
+
+    def __init__(self, name, module, flags=0):
+        self.name = name
+        self.module = module
+        self.flags = flags
+        self.error = module.error
+
+    @property
+    def re_flags(self):
+        """ The flags as the standard library understands them. """
+        return self.flags & _re_flags
+
+    def flags_of(self, expression):
+        """ The flags ``expression`` compiles with: its own ``flags``, or
+        the engine's if it has none (``None``).
+        """
+        flags = getattr(expression, 'flags', None)
+        return self.flags if flags is None else flags
+
+    def re_flags_of(self, expression):
+        """ ``flags_of(expression)`` as the standard library understands them. """
+        return self.flags_of(expression) & _re_flags
+
+    def compile(self, expression, flags=None):
+        """ Compile ``expression`` with ``flags``, the engine's if ``None``
+        (through ``reparse.compiled.pattern_cache``).
+        """
+        return pattern_cache.compile(expression, self.flags if flags is None else flags, self.module)
+
+    def sub(self, expression, replacement, string):
+        return self.compile(expression).sub(replacement, string)
+
+    def __repr__(self):
+        return 'Engine({!r})'.format(self.name)
+
+
+_engines = {}
+
+
+def register_engine(name, module, flags=None):
+    """ Make ``module`` available as engine ``name``, compiling with
+    ``flags`` (``reparse.config.regex_flags`` by default).
+    """
+    if flags is None:
+        flags = int(config.regex_flags)
+    _engines[name] = Engine(name, module, flags)
+    return _engines[name]
+
+
+def engine_names():
+    """ Names of the registered engines. """
+    return sorted(_engines)
+
+
+def get_engine(engine=None):
+    """ The engine called ``engine``, ``engine`` itself if it already is
+    one, or the default engine for ``None``.
+    """
+    if isinstance(engine, Engine):
+        return engine
+    if engine is None:
+        engine = config.default_engine
+    try:
+        return _engines[engine]
+    except KeyError:
+        raise ValueError("Unknown regex engine [{}], registered: {}".format(engine, ", ".join(engine_names())))
+
+
+class ConcurrentPattern(object):
+    """ A compiled ``regex`` pattern that always matches with ``concurrent=True``. """
+    __slots__ = ('_pattern',)
+
+    def __init__(self, pattern):
+        self._pattern = pattern
+
+    def __getattr__(self, name):
+        return getattr(self._pattern, name)
+
+    def search(self, string, *args, **kwargs):
+        return self._pattern.search(string, *args, concurrent=True, **kwargs)
+
+    def match(self, string, *args, **kwargs):
+        return self._pattern.match(string, *args, concurrent=True, **kwargs)
+
+    def fullmatch(self, string, *args, **kwargs):
+        return self._pattern.fullmatch(string, *args, concurrent=True, **kwargs)
+
+    def findall(self, string, *args, **kwargs):
+        return self._pattern.findall(string, *args, concurrent=True, **kwargs)
+
+    def finditer(self, string, *args, **kwargs):
+        return self._pattern.finditer(string, *args, concurrent=True, **kwargs)
+
+    def sub(self, replacement, string, *args, **kwargs):
+        return self._pattern.sub(replacement, string, *args, concurrent=True, **kwargs)
+
+
+class _ConcurrentRegex(object):
+    """ The ``regex`` module, compiling to ``ConcurrentPattern``. """
+    __name__ = 'regex-concurrent'
+    error = regex.error
+
+    @staticmethod
+    def compile(expression, flags=0):
+        return ConcurrentPattern(regex.compile(expression, flags))
+
+
+register_engine('regex', regex)
+register_engine('re', re)
+register_engine('regex-concurrent', _ConcurrentRegex())
@@ -1,4 +1,14 @@
 import re
+import threading
+
+from reparse.engines import get_engine
+
+# Compiling (and the optimizations right before it) happens once per
+# expression, even when several threads ask for the pattern at once
+_compile_lock = threading.RLock()
+
+# Group references would point at the wrong groups once regexes are joined
+_group_reference = re.compile(r'\\[1-9]|\(\?P=|\(\?\(')
 
 
 class InvalidPattern(Exception):
@@ -12,27 +22,54 @@ class InvalidPattern(Exception):
 
 
 class SimpleExpression(object):
+    """ A named regex whose matches are passed to ``func``.
+
+    ``engine`` is the name of the regex engine to compile with (see
+    ``reparse.engines``), the default engine if ``None``. ``regex`` is
+    compiled with ``flags``, none by default; ``None`` takes the engine's
+    (``reparse.config.regex_flags``), as the expressions built from YAML do.
+
+    ``match_regex``, when set, is compiled instead of ``regex``: the same
+    regex after optimizations that only make sense at the top level
+    (see ``reparse.optimize.eliminate_dead_captures``).
+    """
+
+    match_regex = None
 
-    def __init__(self, name, regex, func):
+    def __init__(self, name, regex, func, engine=None, flags=0):
         super(SimpleExpression, self).__init__()
         self.name = name
         self.regex = regex
         self.func = func
+        self.engine = engine
+        self.flags = flags
         self._compiled = None
 
     @property
     def pattern(self):
-        if not self._compiled:
-            try:
-                self._compiled = re.compile(self.regex)
-            except re.error as e:
-                raise InvalidPattern(self.regex, e)
+        if self._compiled is None:
+            with _compile_lock:
+                if self._compiled is None:
+                    self._compile()
         return self._compiled
 
+    def _compile(self):
+        engine = get_engine(self.engine)
+        try:
+            self._compiled = engine.compile(self.match_regex or self.regex, engine.flags_of(self))
+        except engine.error as e:
+            raise InvalidPattern(self.match_regex or self.regex, e)
+
+    def __getstate__(self):
+        # Compiled regexes are looked up again in ``pattern_cache`` after unpickling
+        state = self.__dict__.copy()
+        state['_compiled'] = None
+        return state
+
     def findall(self, string):
         matches = self.pattern.findall(string)
         for match in matches:
-            if isinstance(match, str):
+            if isinstance(match, (str, bytes)):
                 yield self.func(match)
             else:
                 yield self.func(*match)
@@ -50,22 +87,86 @@ class Expression(SimpleExpression):
     When an expression runs with ``findall`` or ``scan``,
     it matches a string using its regex, and returns the
     results from the parsing functions.
+
+    Built patterns also get a ``plan`` (see ``reparse.plan``), which
+    ``run`` uses instead of walking the tree of expressions.
+
+    Expressions made by ``Group`` share their children instead of copying
+    their regexes: the regex text is only put together when it's first
+    used, and intermediate groups never hold text of their own.
     """
 
-    def __init__(self, regex, functions, group_lengths, final_function, name=""):
+    plan = None
+    # Built from YAML, so compiled with the engine's flags
+    flags = None
+    # Called with the expression right before its regex is first compiled
+    before_compile = None
+
+    def __init__(self, regex, functions, group_lengths, final_function, name="", engine=None):
+        self._parts = None
         self.regex = regex
         self.group_functions = functions
         self.group_lengths = group_lengths
         self.final_function = final_function
         self.name = name
+        self.engine = engine
         self._compiled = None
 
+    def _compile(self):
+        if self.before_compile is not None:
+            before_compile, self.before_compile = self.before_compile, None
+            before_compile(self)
+        SimpleExpression._compile(self)
+
+    def __getstate__(self):
+        state = SimpleExpression.__getstate__(self)
+        if getattr(self.plan, 'source', None) is not None:
+            # Generated code is generated again (see ``reparse.codegen``)
+            # from the plan it was made from, which matches ``match_regex``
+            state['plan'] = self.plan.plan
+            state['_generated'] = True
+        return state
+
+    def __setstate__(self, state):
+        generated = state.pop('_generated', False)
+        self.__dict__.update(state)
+        if generated:
+            from reparse.codegen import compile_pattern
+            self.plan = compile_pattern(self)
+
+    @property
+    def regex(self):
+        if self._regex is None and self._parts is not None:
+            self._regex = self._materialize()
+        return self._regex
+
+    @regex.setter
+    def regex(self, regex):
+        self._regex = regex
+
+    def _materialize(self):
+        """ The regex text of a group, from its children's (without recursion). """
+        pieces = []
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                pieces.append(item)
+            elif item is not self and (getattr(item, '_parts', None) is None or item._regex is not None):
+                pieces.append(item.regex)
+            else:
+                inbetweens, children = item._parts
+                stack.append(inbetweens[len(children)])
+                for inbetween, child in reversed(list(zip(inbetweens, children))):
+                    stack.extend((')', child, '(?:', inbetween))
+        return ''.join(pieces)
+
     def findall(self, string):
         """ Parse string, returning all outputs as parsed by functions
         """
         output = []
         for match in self.pattern.findall(string):
-            if isinstance(match, str):
+            if isinstance(match, (str, bytes)):
                 match = [match]
             self._list_add(output, self.run(match))
         return output
@@ -73,11 +174,14 @@ class Expression(SimpleExpression):
     def scan(self, string):
         """ Like findall, but also returning matching start and end string locations
         """
-        return list(self._scanner_to_matches(self.pattern.scanner(string), self.run))
+        return list(self._scanner_to_matches(self.pattern.finditer(string), self.run))
 
     def run(self, matches):
         """ Run group functions over matches
         """
+        if self.plan is not None:
+            return self.plan(matches)
+
         def _run(matches):
             group_starting_pos = 0
             for current_pos, (group_length, group_function) in enumerate(zip(self.group_lengths, self.group_functions)):
@@ -112,7 +216,7 @@ class Expression(SimpleExpression):
         none_to_blank = lambda _: '' if _ is None else _
 
         for match in scanner:
-            result = processor(map(none_to_blank, match.groups()))
+            result = processor(tuple(map(none_to_blank, match.groups())))
             if result is None:
                 continue
             elif type(result) is list:
@@ -121,7 +225,116 @@ class Expression(SimpleExpression):
                 yield [[result], match.start(), match.end()]
 
 
-def AlternatesGroup(expressions, final_function, name=""):
+class CombinedExpression(SimpleExpression):
+    """ Several expressions compiled into one alternation, so a string
+    can be scanned once for all of them.
+
+    Each expression is wrapped in its own capture group: the wrapper
+    group tells which branch matched (it is always ``match.lastindex``)
+    and where that branch's groups start in ``match.groups()``.
+
+    >>> a = Expression('(a)', [None], [1], None, 'a')
+    >>> b = Expression('(b)(c)', [None, None], [1, 1], None, 'b')
+    >>> combined = CombinedExpression([a, b])
+    >>> combined.regex
+    '((a))|((b)(c))'
+    >>> index, matches = combined.top_matches('bc a')
+    >>> [combined.branch(m) for m in matches]
+    [(0, ['a'])]
+    """
+
+    def __init__(self, expressions, engine=None):
+        self.expressions = list(expressions)
+        for expression in self.expressions:
+            expression.pattern
+        self._wrapped = ["(" + (e.match_regex or e.regex) + ")" for e in self.expressions]
+        self.regex = "|".join(self._wrapped)
+        self.name = ""
+        if engine is None and self.expressions:
+            engine = self.expressions[0].engine
+        self.engine = engine
+        self.flags = getattr(self.expressions[0], 'flags', None) if self.expressions else None
+        self._compiled = None
+        # number of expressions -> the alternation of that many first ones
+        self._heads = {}
+        # wrapper group index -> (expression index, first group, group count)
+        self._branches = {}
+        group = 1
+        for i, expression in enumerate(self.expressions):
+            group_count = expression.pattern.groups
+            if expression.pattern.groupindex or _group_reference.search(expression.regex):
+                raise InvalidPattern(expression.regex, "named or referenced groups can't be combined")
+            if getattr(expression, 'flags', None) != self.flags:
+                raise InvalidPattern(expression.regex, "expressions with different flags can't be combined")
+            self._branches[group] = (i, group + 1, group_count)
+            group += group_count + 1
+
+    def __getstate__(self):
+        state = SimpleExpression.__getstate__(self)
+        state['_heads'] = {}
+        return state
+
+    def _head(self, count):
+        """ The compiled alternation of the first ``count`` expressions. """
+        pattern = self._heads.get(count)
+        if pattern is None:
+            engine = get_engine(self.engine)
+            pattern = self._heads[count] = engine.compile("|".join(self._wrapped[:count]), engine.flags_of(self))
+        return pattern
+
+    def top_matches(self, string):
+        """ Return ``(index, matches)``: the index of the first expression
+        that matches anywhere in ``string``, and its matches as ``finditer``
+        finds them (left to right, not overlapping). ``(None, [])`` if no
+        expression matches.
+
+        The scan resumes at the end of every match. The positions a match
+        skips over are searched again only for the expressions that could
+        still change the outcome -- the ones ranked above the best so far
+        -- and with one search for all of them.
+        """
+        search = self.pattern.search
+        best, matches = None, []
+        # expression count -> where the next match of the first ones starts
+        next_start = {}
+        pos = 0
+        while pos <= len(string):
+            match = search(string, pos)
+            if match is None:
+                break
+            start, end = match.span()
+            index = self._branches[match.lastindex][0]
+            if best is None or index < best:
+                best, matches = index, []
+            if index == best:
+                matches.append(match)
+                above = best
+            else:
+                # a match of ``best`` may start inside this one
+                above = best + 1
+            pos = end if end > start else start + 1
+            if above and end > start + 1:
+                if next_start.get(above, -1) <= start:
+                    probe = self._head(above).search(string, start + 1)
+                    next_start[above] = len(string) + 1 if probe is None else probe.start()
+                pos = min(pos, next_start[above])
+        return best, matches
+
+    def branch(self, match):
+        """ Return ``(expression index, groups)`` for a match,
+        with groups shaped the way ``Expression.findall`` passes them to ``run``.
+        """
+        index, first, count = self._branches[match.lastindex]
+        if count == 0:
+            groups = [match.group(match.lastindex)]
+        elif count == 1:
+            groups = [match.group(first) or '']
+        else:
+            groups = tuple('' if g is None else g for g in match.groups()[first - 1:first - 1 + count])
+        return index, groups
+
+
+def AlternatesGroup(expressions, final_function, name="", engine=None):
     """ Group expressions using the OR character ``|``
     >>> from collections import namedtuple
     >>> expr = namedtuple('expr', 'regex group_lengths run')('(1)', [1], None)
@@ -134,22 +347,19 @@ def AlternatesGroup(expressions, final_function, name=""):
     inbetweens = ["|"] * (len(expressions) + 1)
     inbetweens[0] = ""
     inbetweens[-1] = ""
-    return Group(expressions, final_function, inbetweens, name)
+    return Group(expressions, final_function, inbetweens, name, engine)
 
 
-def Group(expressions, final_function, inbetweens, name=""):
+def Group(expressions, final_function, inbetweens, name="", engine=None):
     """ Group expressions together with ``inbetweens`` and with the output of a ``final_functions``.
+
+    >>> one = Expression('(1)', [None], [1], None)
+    >>> Group([one, one], None, ['a', '|', 'b']).regex
+    'a(?:(1))|(?:(1))b'
     """
-    lengths = []
-    functions = []
-    regex = ""
-    i = 0
-    for expression in expressions:
-        regex += inbetweens[i]
-        regex += "(?:" + expression.regex + ")"
-        lengths.append(sum(expression.group_lengths))
-        functions.append(expression.run)
-        i += 1
-    regex += inbetweens[i]
-
-    return Expression(regex, functions, lengths, final_function, name)
+    expressions = list(expressions)
+    lengths = [sum(expression.group_lengths) for expression in expressions]
+    functions = [expression.run for expression in expressions]
+    group = Expression(None, functions, lengths, final_function, name, engine)
+    group._parts = (list(inbetweens[:len(expressions) + 1]), expressions)
+    return group
@@ -0,0 +1,234 @@
+""" Opt-in instrumentation of pattern based parsers.
+
+``instrumented(parser_type, recorder)`` is a parser type whose patterns
+report to ``recorder`` while they parse. Per pattern name it counts:
+
+- ``evaluations``: lines the pattern was run on
+- ``matches``: lines it produced results for
+- ``discarded``: results left out of the output, because a higher
+  ``order`` pattern won (``basic_parser``) or a higher ``order`` match
+  overlapped them (``alt_parser``)
+- ``regex_time`` and ``function_time``: seconds spent matching and in the
+  functions ``Function_Builder`` bound to the pattern's tree
+
+and per expression type (the ``<Type>`` parts of a pattern) how often it
+was evaluated on a pattern match, how often it matched and the seconds
+spent in it. Parsers that aren't instrumented don't pay for any of this.
+
+``combined_parser`` scans for all patterns at once; that shared scan isn't
+attributed to any pattern.
+
+Example Usage::
+
+    recorder = Recorder()
+    parse = reparse.parser(parser_type=instrumented(reparse.basic_parser, recorder), ...)
+    for line in lines:
+        parse(line)
+    recorder.snapshot()['patterns']['Fax Phone']['discarded']
+"""
+import copy
+import json
+import threading
+import time
+
+from reparse.expression import Expression
+from reparse.plan import plan_of
+
+_state = threading.local()
+
+
+def _pattern_stats():
+    return {'evaluations': 0, 'matches': 0, 'discarded': 0, 'regex_time': 0.0, 'function_time': 0.0}
+
+
+def _type_stats():
+    return {'evaluations': 0, 'matches': 0, 'time': 0.0}
+
+
+class Recorder(object):
+    """ Collects the statistics of instrumented parsers. """
+
+    def __init__(self):
+        self._patterns = {}
+        self._types = {}
+        self._lock = threading.Lock()
+
+    def add(self, kind, name, **amounts):
+        """ Add ``amounts`` to the statistics of pattern or type ``name``. """
+        stats, new = (self._patterns, _pattern_stats) if kind == 'pattern' else (self._types, _type_stats)
+        with self._lock:
+            entry = stats.get(name)
+            if entry is None:
+                entry = stats[name] = new()
+            for key, amount in amounts.items():
+                entry[key] += amount
+
+    def snapshot(self):
+        """ ``{'patterns': {name: stats}, 'types': {name: stats}}`` as of now. """
+        with self._lock:
+            return {'patterns': copy.deepcopy(self._patterns), 'types': copy.deepcopy(self._types)}
+
+    def dump(self, f):
+        """ Write a snapshot to the file object ``f`` as JSON. """
+        json.dump(self.snapshot(), f, indent=2, sort_keys=True)
+
+    def reset(self):
+        with self._lock:
+            self._patterns.clear()
+            self._types.clear()
+
+
+class _TimedRegex(object):
+    """ A compiled regex that adds the time spent in it to a pattern's ``regex_time``. """
+
+    def __init__(self, compiled, record):
+        self._compiled = compiled
+        self._record = record
+
+    def __getattr__(self, name):
+        return getattr(self._compiled, name)
+
+    def findall(self, string, *args):
+        start = time.perf_counter()
+        try:
+            return self._compiled.findall(string, *args)
+        finally:
+            self._record(regex_time=time.perf_counter() - start)
+
+    def search(self, string, *args):
+        start = time.perf_counter()
+        try:
+            return self._compiled.search(string, *args)
+        finally:
+            self._record(regex_time=time.perf_counter() - start)
+
+    def finditer(self, string, *args):
+        matches = self._compiled.finditer(string, *args)
+        while True:
+            start = time.perf_counter()
+            match = next(matches, None)
+            self._record(regex_time=time.perf_counter() - start)
+            if match is None:
+                return
+            yield match
+
+
+def _timer_start(function):
+    def timed(matches):
+        _state.timers.append(time.perf_counter())
+        return function(matches)
+    return timed
+
+
+def _timer_stop(function, record):
+    def timed(matches):
+        result = function(matches)
+        record(evaluations=1, matches=int(result is not None), time=time.perf_counter() - _state.timers.pop())
+        return result
+    return timed
+
+
+def _type_steps(pattern, recorder):
+    """ The steps of ``pattern``'s plan, with the spans of its types timed. """
+    pattern.pattern  # settle the plan before timing it
+    plan = copy.copy(plan_of(pattern))
+    steps = list(plan.steps)
+    for expression, first, last, parent in plan.nodes:
+        # Types are the children of a pattern (a pattern used in another
+        # pattern is a type too); patterns have names, type groups don't.
+        if parent is None or (parent is not pattern and not parent.name):
+            continue
+        name = expression.final_function.__name__
+        record = lambda name=name, **amounts: recorder.add('type', name, **amounts)
+        function, start, end, arity = steps[last]
+        steps[last] = (_timer_stop(function, record), start, end, arity)
+        function, start, end, arity = steps[first]
+        steps[first] = (_timer_start(function), start, end, arity)
+    plan.steps = steps
+    return plan
+
+
+class InstrumentedPattern(object):
+    """ A built pattern that reports to a ``Recorder``; everything else is
+    the pattern's own.
+    """
+
+    def __init__(self, pattern, recorder):
+        self._expression = pattern
+        self._recorder = recorder
+        self._plan = _type_steps(pattern, recorder)
+        self._timed = None
+
+    def __getattr__(self, name):
+        return getattr(self._expression, name)
+
+    def _record(self, **amounts):
+        self._recorder.add('pattern', self._expression.name, **amounts)
+
+    @property
+    def pattern(self):
+        if self._timed is None:
+            self._timed = _TimedRegex(self._expression.pattern, self._record)
+        return self._timed
+
+    def run(self, matches):
+        if not hasattr(_state, 'timers'):
+            _state.timers = []
+        start = time.perf_counter()
+        try:
+            return self._plan(matches)
+        finally:
+            self._record(function_time=time.perf_counter() - start)
+
+    def findall(self, string):
+        results = Expression.findall(self, string)
+        self._produced(results, False)
+        return results
+
+    def scan(self, string):
+        results = Expression.scan(self, string)
+        self._produced(results, True)
+        return results
+
+    def _produced(self, results, per_match):
+        matched = bool(results and any(results))
+        self._record(evaluations=1, matches=int(matched))
+        produced = getattr(_state, 'produced', None)
+        if matched and produced is not None:
+            produced.append((self, results, per_match))
+
+
+def _kept(output):
+    """ Identities of the results in a parser's output. """
+    kept = set([id(output)])
+    if isinstance(output, (list, tuple)):
+        kept.update(id(item) for item in output)
+    return kept
+
+
+def instrumented(parser_type, recorder):
+    """ A parser type that is ``parser_type`` over patterns reporting to ``recorder``. """
+    def parser_type_with_instruments(patterns):
+        wrapped = [InstrumentedPattern(pattern, recorder) for pattern in patterns]
+        parse = parser_type(wrapped)
+
+        def instrumented_parse(line):
+            outer = getattr(_state, 'produced', None)
+            _state.produced = produced = []
+            try:
+                output = parse(line)
+            finally:
+                _state.produced = outer
+            kept = _kept(output)
+            for pattern, results, per_match in produced:
+                if per_match:
+                    discarded = sum(1 for match in results if id(match[0]) not in kept)
+                else:
+                    discarded = int(id(results) not in kept)
+                if discarded:
+                    pattern._record(discarded=discarded)
+            return output
+
+        return instrumented_parse
+    parser_type_with_instruments.__name__ = getattr(parser_type, '__name__', 'parser_type')
+    return parser_type_with_instruments
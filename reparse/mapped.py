@@ -0,0 +1,89 @@
+""" Memory mapped file input.
+
+Files given by path or file descriptor are mapped read-only and lines are
+found by searching the mapping for line endings. This skips Python's
+text-mode I/O; each line is decoded on its own, or not at all when the
+patterns are bytes patterns (``encoding=None``).
+
+Lines end as in text-mode files (universal newlines): at ``\\n``,
+``\\r\\n`` or ``\\r``, which all become ``\\n``. ``reparse.parallel``
+splits its chunks into lines the same way.
+"""
+import contextlib
+import mmap
+import os
+import re
+
+_line_end = re.compile(b'\r\n?|\n')
+
+
+def is_file_source(source):
+    """ Whether ``source`` is a path or a file descriptor rather than a file object. """
+    return isinstance(source, (int, str, bytes)) or hasattr(source, '__fspath__')
+
+
+@contextlib.contextmanager
+def mapped(source):
+    """ Map the file at path ``source`` (or the file descriptor ``source``)
+    read-only. Empty files can't be mapped and give ``b''`` instead.
+
+    File descriptors are left open.
+    """
+    if isinstance(source, int):
+        fd = source
+    else:
+        fd = os.open(source, os.O_RDONLY)
+    try:
+        if os.fstat(fd).st_size == 0:
+            yield b''
+        else:
+            buffer = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+            try:
+                yield buffer
+            finally:
+                buffer.close()
+    finally:
+        if fd is not source:
+            os.close(fd)
+
+
+def iter_buffer_lines(buffer, encoding='utf-8'):
+    """ Yield ``(offset, line)`` for the lines of ``buffer``, with
+    ``offset`` in bytes. Lines are decoded with ``encoding``, or left as
+    bytes if it is ``None``. Their endings become ``\\n``.
+
+    >>> list(iter_buffer_lines(b'a\\nbc\\nd'))
+    [(0, 'a\\n'), (2, 'bc\\n'), (5, 'd')]
+    >>> list(iter_buffer_lines(b'a\\r\\nbc\\rd'))
+    [(0, 'a\\n'), (3, 'bc\\n'), (6, 'd')]
+    """
+    size = len(buffer)
+    start = 0
+    if buffer.find(b'\r') < 0:
+        # Only ``\\n`` to look for
+        find = buffer.find
+        while start < size:
+            end = find(b'\n', start)
+            end = size if end < 0 else end + 1
+            line = buffer[start:end]
+            yield start, line if encoding is None else line.decode(encoding)
+            start = end
+        return
+    search = _line_end.search
+    while start < size:
+        match = search(buffer, start)
+        if match is None:
+            line, end = buffer[start:], size
+        else:
+            line, end = buffer[start:match.start()] + b'\n', match.end()
+        yield start, line if encoding is None else line.decode(encoding)
+        start = end
+
+
+def iter_mapped(parse, source, encoding='utf-8'):
+    """ Run ``parse`` over the lines of a memory mapped file, yielding
+    ``(line_number, offset, result)`` with byte offsets.
+    """
+    with mapped(source) as buffer:
+        for line_number, (offset, line) in enumerate(iter_buffer_lines(buffer, encoding), 1):
+            yield line_number, offset, parse(line)
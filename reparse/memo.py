@@ -0,0 +1,135 @@
+""" Memoization of parsed lines.
+
+Logs repeat many identical lines (heartbeats, health checks...). A
+``LineCache`` sits in front of any parse function (``basic_parser``,
+``alt_parser``, ``Parser.line``...) and returns the result of a line it has
+seen before without running a regex or function again. It holds at most
+``maxsize`` lines and evicts the least recently used one first.
+
+Lines whose parse calls a function marked with ``impure`` (anything reading
+the clock, counters, external state...) are never cached.
+"""
+import copy
+import functools
+import threading
+from collections import OrderedDict
+
+from reparse.config import line_cache_size
+
+_state = threading.local()
+
+
+def impure(function):
+    """ Mark a parsing function as impure: results of lines that call it
+    are not cached.
+
+    >>> import itertools
+    >>> counter = itertools.count()
+    >>> parse = LineCache(impure(lambda line: next(counter)))
+    >>> parse('a'), parse('a')
+    (0, 1)
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        _state.impure = True
+        return function(*args, **kwargs)
+    wrapper.impure = True
+    return wrapper
+
+
+def _shared(result):
+    return result
+
+
+class LineCache(object):
+    """ ``parse`` with its results cached by line.
+
+    Results are copied with ``copy`` (``copy.deepcopy`` by default) on the
+    way out, so callers can change them without changing the cache; pass
+    ``copy=None`` to share them.
+
+    >>> parse = LineCache(lambda line: [len(line)], maxsize=2)
+    >>> parse('ab'), parse('ab'), parse('abc'), parse('abcd')
+    ([2], [2], [3], [4])
+    >>> parse.info()
+    {'hits': 1, 'misses': 3, 'impure': 0, 'evictions': 1, 'size': 2, 'maxsize': 2, 'hit_rate': 0.25}
+    """
+
+    def __init__(self, parse, maxsize=line_cache_size, copy=copy.deepcopy):
+        self.parse = parse
+        self.maxsize = maxsize
+        self.copy = copy or _shared
+        self.hits = 0
+        self.misses = 0
+        self.impure = 0
+        self.evictions = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, line):
+        with self._lock:
+            if line in self._results:
+                self._results.move_to_end(line)
+                self.hits += 1
+                return self.copy(self._results[line])
+            self.misses += 1
+
+        outer = getattr(_state, 'impure', False)
+        _state.impure = False
+        try:
+            result = self.parse(line)
+        finally:
+            called_impure, _state.impure = _state.impure, outer or _state.impure
+        if called_impure:
+            with self._lock:
+                self.impure += 1
+            return result
+
+        with self._lock:
+            self._results[line] = result
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+                self.evictions += 1
+        return self.copy(result)
+
+    def __reduce__(self):
+        # the cached lines stay behind
+        return LineCache, (self.parse, self.maxsize, self.copy)
+
+    def info(self):
+        """ Hit/miss statistics and the current size. """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'impure': self.impure,
+            'evictions': self.evictions,
+            'size': len(self._results),
+            'maxsize': self.maxsize,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        """ Drop every cached line and reset the statistics. """
+        with self._lock:
+            self._results.clear()
+            self.hits = self.misses = self.impure = self.evictions = 0
+
+
+class _MemoizedParserType(object):
+    def __init__(self, parser_type, maxsize, kwargs):
+        self.parser_type = parser_type
+        self.maxsize = maxsize
+        self.kwargs = kwargs
+        self.__name__ = getattr(parser_type, '__name__', 'parser_type')
+
+    def __call__(self, patterns):
+        return LineCache(self.parser_type(patterns), self.maxsize, **self.kwargs)
+
+
+def memoized(parser_type, maxsize=line_cache_size, **kwargs):
+    """ A parser type that is ``parser_type`` behind a ``LineCache``::
+
+        parse = memoized(basic_parser, maxsize=10000)(build_all(...))
+    """
+    return _MemoizedParserType(parser_type, maxsize, kwargs)
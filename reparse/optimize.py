@@ -0,0 +1,291 @@
+""" Regex rewrites that keep matches and results the same.
+
+Gazetteer-like expressions, one capture group holding a long alternation
+of plain words (``(Orange|Green|...)``), make the engine try every branch
+in turn. ``optimize_alternation`` factors those words into a prefix trie,
+``(Gre(?:en|y)|Orange)``, so each character of the input is looked at
+about once.
+
+Branch priority is kept exactly: branches starting with different
+characters can't both match at one place, so they may be grouped, but an
+alternative that ends (``Green`` in ``Green|Greenish``) stays in front of
+the longer ones listed after it, and behind the ones listed before it.
+
+``eliminate_dead_captures`` turns the capture groups of a pattern that no
+function ever reads into non-capturing groups, so matches carry fewer
+groups.
+"""
+import copy
+import re
+from collections import OrderedDict
+
+from reparse.config import alternation_trie_threshold
+from reparse.engines import get_engine
+from reparse.expression import _group_reference
+from reparse.util import sre_parse
+
+_boundary = r'\b'
+
+
+def _split_alternatives(text):
+    """ ``text`` split at its top level ``|``, or ``None`` if it has
+    groups, classes or comments of its own.
+    """
+    alternatives = ['']
+    escaped = False
+    for char in text:
+        if escaped:
+            alternatives[-1] += char
+            escaped = False
+        elif char == '\\':
+            alternatives[-1] += char
+            escaped = True
+        elif char in '()[]#':
+            return None
+        elif char == '|':
+            alternatives.append('')
+        else:
+            alternatives[-1] += char
+    return alternatives
+
+
+def _literal(regex, flags):
+    """ The plain text ``regex`` matches, or ``None`` if it isn't one. """
+    try:
+        parsed = sre_parse.parse(regex, flags)
+    except Exception:
+        return None
+    if any(str(op) != 'LITERAL' for op, _ in parsed):
+        return None
+    return ''.join(chr(av) for _, av in parsed)
+
+
+def literal_alternatives(regex, flags=0):
+    """ ``(prefix, words, suffix)`` for a regex that is one capture group of
+    plain alternatives, optionally between word boundaries, else ``None``.
+
+    >>> literal_alternatives(r' \\b(Orange | Green | Dark\\ Blue)\\b ', re.VERBOSE)
+    ('\\\\b', ['Orange', 'Green', 'Dark Blue'], '\\\\b')
+    >>> literal_alternatives(r'(\\d+|none)') is None
+    True
+    """
+    text = regex.strip() if flags & re.VERBOSE else regex
+    prefix = suffix = ''
+    if text.startswith(_boundary):
+        prefix, text = _boundary, text[len(_boundary):]
+    if text.endswith(_boundary) and not text.endswith('\\' + _boundary):
+        suffix, text = _boundary, text[:-len(_boundary)]
+    if flags & re.VERBOSE:
+        text = text.strip()
+    if not (text.startswith('(') and text.endswith(')')) or text.startswith('(?'):
+        return None
+    alternatives = _split_alternatives(text[1:-1])
+    if alternatives is None:
+        return None
+    words = [_literal(alternative, flags) for alternative in alternatives]
+    if None in words:
+        return None
+    return prefix, words, suffix
+
+
+def trie_regex(words, ignore_case=False):
+    """ A regex matching ``words`` exactly like ``'|'.join(words)`` would,
+    with common prefixes factored out.
+
+    >>> trie_regex(['Green', 'Grey', 'Orange'])
+    '(?:Gre(?:en|y)|Orange)'
+    >>> trie_regex(['Greenish', 'Green', 'Greenery'])
+    'Green(?:ish||ery)'
+    """
+    seen = set()
+    unique = [word for word in words if not (word in seen or seen.add(word))]
+    return _alternation(_factor(unique, ignore_case))
+
+
+def _alternation(alternatives):
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return '(?:' + '|'.join(alternatives) + ')'
+
+
+def _factor(words, ignore_case):
+    """ Alternatives (regex text) for ``words``, in priority order. """
+    if len(words) == 1:
+        return [re.escape(words[0])]
+    if '' in words:
+        # the empty word always matches: nothing can move across it
+        i = words.index('')
+        before, after = words[:i], words[i + 1:]
+        return (_factor(before, ignore_case) if before else []) + [''] + \
+            (_factor(after, ignore_case) if after else [])
+
+    firsts = [word[0] for word in words]
+    if ignore_case and not all(ord(char) < 128 for char in firsts):
+        # case folding outside ASCII isn't one to one: only group neighbours
+        groups = []
+        for word in words:
+            if groups and groups[-1][0][0] == word[0]:
+                groups[-1].append(word)
+            else:
+                groups.append([word])
+    else:
+        by_first = OrderedDict()
+        for word in words:
+            by_first.setdefault(word[0].lower() if ignore_case else word[0], []).append(word)
+        groups = list(by_first.values())
+
+    alternatives = []
+    for group in groups:
+        if len(group) == 1:
+            alternatives.append(re.escape(group[0]))
+        else:
+            rest = _factor([word[1:] for word in group], ignore_case)
+            alternatives.append(re.escape(group[0][0]) + _alternation(rest))
+    return alternatives
+
+
+def optimize_alternation(regex, flags=0, threshold=alternation_trie_threshold):
+    """ ``regex`` with its alternation of ``threshold`` or more words factored
+    into a trie, or ``regex`` itself if it isn't such an alternation. The
+    one capture group stays, so groups and functions are unchanged.
+
+    >>> optimize_alternation('(Green|Grey|Orange)', threshold=2)
+    '((?:Gre(?:en|y)|Orange))'
+    """
+    found = literal_alternatives(regex, flags)
+    if found is None or len(found[1]) < threshold:
+        return regex
+    prefix, words, suffix = found
+    return prefix + '(' + trie_regex(words, bool(flags & re.IGNORECASE)) + ')' + suffix
+
+
+def capture_positions(regex, verbose=False):
+    """ Where the capture groups of ``regex`` open, or ``None`` if groups
+    are named or referenced (renumbering them would break the references).
+
+    >>> capture_positions(r'(a)(?:b)[(](c) # (d)', verbose=True)
+    [0, 11]
+    >>> capture_positions(r'(?P<x>a)') is None
+    True
+    """
+    if _group_reference.search(regex) or '(?|' in regex:
+        return None
+    positions = []
+    i = 0
+    in_class = False
+    while i < len(regex):
+        char = regex[i]
+        if char == '\\':
+            i += 2
+            continue
+        if in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+            i += 1
+            if regex[i:i + 1] == '^':
+                i += 1
+            if regex[i:i + 1] == ']':
+                i += 1
+            continue
+        elif verbose and char == '#':
+            newline = regex.find('\n', i)
+            i = len(regex) if newline < 0 else newline
+        elif char == '(':
+            if not regex.startswith('(?', i):
+                positions.append(i)
+            elif regex.startswith('(?P<', i) or (regex.startswith('(?<', i) and regex[i + 3:i + 4] not in '=!'):
+                return None
+        i += 1
+    return positions
+
+
+def _dead_steps(steps):
+    """ Group function steps whose result is provably thrown away: default
+    (pure) group functions whose value the expression function ignores.
+    """
+    dead = set()
+    produced_by = []
+    for i, (function, _, _, arity) in enumerate(steps):
+        if arity is None:
+            produced_by.append(i)
+            continue
+        arguments = produced_by[len(produced_by) - arity:]
+        del produced_by[len(produced_by) - arity:]
+        for position in getattr(function, 'unused_arguments', ()):
+            step = arguments[position]
+            if steps[step][3] is None and getattr(steps[step][0], 'pure', False):
+                dead.add(step)
+        produced_by.append(i)
+    return dead
+
+
+def _unused(_):
+    return None
+
+
+def eliminate_dead_captures(pattern):
+    """ Compile ``pattern`` without the captures no function reads, and
+    adjust its plan to the new group numbers.
+
+    A capture is dead if no group function slices it (captures past the
+    groups an expression declares, or in the text between a pattern's
+    ``<Type>`` parts, once nothing after them is read) or if the only
+    function slicing it is a default group function whose value the
+    expression function ignores. Only the top level regex
+    (``match_regex``) changes: the expressions inside are shared.
+    Returns the dead group indices.
+    """
+    plan = getattr(pattern, 'plan', None)
+    if not hasattr(plan, 'steps'):
+        return []
+    flags = get_engine(pattern.engine).re_flags
+    regex = pattern.regex
+    if not isinstance(regex, str):
+        return []
+    positions = capture_positions(regex, bool(flags & re.VERBOSE))
+    if not positions or _group_count(regex, flags) != len(positions):
+        return []
+
+    dead_steps = _dead_steps(plan.steps)
+    read = set()
+    for i, (_, start, end, arity) in enumerate(plan.steps):
+        if arity is None and i not in dead_steps:
+            read.update(range(start, min(end, len(positions))))
+    dead = [i for i in range(len(positions)) if i not in read]
+    if not dead:
+        return []
+
+    pieces = []
+    last = 0
+    for i in dead:
+        pieces.append(regex[last:positions[i]] + '(?:')
+        last = positions[i] + 1
+    match_regex = ''.join(pieces) + regex[last:]
+    if _group_count(match_regex, flags) != len(positions) - len(dead):
+        return []
+
+    steps = []
+    for i, (function, start, end, arity) in enumerate(plan.steps):
+        if i in dead_steps:
+            steps.append((_unused, 0, 0, None))
+        elif arity is None:
+            # live slices hold no dead group: they just move left
+            end = min(end, len(positions))
+            new_start = start - sum(1 for d in dead if d < start)
+            steps.append((function, new_start, new_start + max(end - start, 0), None))
+        else:
+            steps.append((function, start, end, arity))
+    new_plan = copy.copy(plan)
+    new_plan.steps = steps
+    pattern.match_regex = match_regex
+    pattern.plan = new_plan
+    pattern._compiled = None
+    return dead
+
+
+def _group_count(regex, flags):
+    try:
+        return sre_parse.parse(regex, flags).state.groups - 1
+    except Exception:
+        return None
@@ -0,0 +1,106 @@
+""" Parallel file parsing.
+
+A file is split into byte ranges that end on line boundaries, every range
+is parsed in a pool of worker processes and the results are merged back
+in file order, giving the same output as parsing the file line by line.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from reparse.mapped import iter_buffer_lines
+
+default_chunk_size = 16 * 1024 * 1024
+
+# The parser a worker process was started with
+_worker_parser = None
+
+
+def chunk_offsets(path, chunk_size=default_chunk_size):
+    """ Split a file into ``(start, end)`` byte ranges of about ``chunk_size``
+    bytes, each ending right after a newline (or at the end of the file).
+    """
+    size = os.path.getsize(path)
+    offsets = []
+    with open(path, 'rb') as f:
+        start = 0
+        while start < size:
+            end = start + chunk_size
+            if end < size:
+                f.seek(end - 1)
+                f.readline()
+                end = f.tell()
+            else:
+                end = size
+            offsets.append((start, end))
+            start = end
+    return offsets
+
+
+def file_path(f):
+    """ The path of the file ``f``: a path, or a file object opened from one.
+
+    Workers open the file themselves, so anything else (file descriptors,
+    in-memory files...) raises ``ValueError``.
+    """
+    if isinstance(f, (str, bytes)) or hasattr(f, '__fspath__'):
+        return f
+    name = getattr(f, 'name', None)
+    if isinstance(name, (str, bytes)) and os.path.isfile(name):
+        return name
+    raise ValueError("Parsing in parallel needs a path or a file opened from one, not {!r}".format(f))
+
+
+def parse_file_parallel(parser, path, workers=None, chunk_size=default_chunk_size, encoding=None):
+    """ Parse the file at ``path`` with ``parser`` (a ``reparse.Parser``)
+    in ``workers`` processes. The merged output is the same as
+    ``parser.parse_file`` gives for the file. ``path`` may also be a file
+    object opened from a path (see ``file_path``).
+
+    Workers are forked where the platform allows it. Elsewhere the parser
+    is pickled to them, so its functions have to be importable.
+    ``encoding`` has to be ASCII compatible (UTF-8, Latin-1, ...) since
+    chunks are split on ``b'\\n'``.
+    """
+    path = file_path(path)
+    context = None
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    final_output = {}
+    starts, ends = [], []
+    for start, end in chunk_offsets(path, chunk_size):
+        starts.append(start)
+        ends.append(end)
+    with ProcessPoolExecutor(workers, context, _init_worker, (parser,)) as pool:
+        chunks = len(starts)
+        results = pool.map(_parse_chunk, [path] * chunks, starts, ends, [encoding] * chunks)
+        for values in results:
+            for key, key_values in values.items():
+                for value in key_values:
+                    parser.merge_output(final_output, {key: value})
+    return final_output
+
+
+def _init_worker(parser):
+    global _worker_parser
+    _worker_parser = parser
+
+
+def _parse_chunk(path, start, end, encoding):
+    """ Parse one byte range of a file.
+
+    Returns every value each key got, in line order. Merging is left to the
+    parent process: how a value merges depends on what came before it in
+    the file, so chunks can't be merged with each other directly. Lines are
+    split as for memory mapped files (see ``reparse.mapped``).
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    values = {}
+    for _, line in iter_buffer_lines(data, encoding):
+        output = _worker_parser.line(line)
+        if output:
+            for key, value in output.items():
+                values.setdefault(key, []).append(value)
+    return values
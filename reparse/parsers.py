@@ -1,15 +1,47 @@
 """ Contains all the parser types and the parser generator.
 """
-from reparse.expression import SimpleExpression
+import copy
+import itertools
+
+from reparse.engines import get_engine
+from reparse.expression import CombinedExpression, Expression, InvalidPattern, SimpleExpression
+from reparse.prefilter import LiteralIndex
+
+# What ``from reparse import *`` (and so the ``reparse`` package) exports
+__all__ = [
+    'basic_parser', 'combined_parser', 'alt_parser', 'pattern_list', 'build_tree_parser', 'PicklableParser',
+    'iter_lines', 'iter_file', 'parser', 'Parser', 'SimpleExpression',
+]
+
+def ranked_patterns(patterns):
+    """ Patterns in the order ordered parsers prefer them: highest ``order``
+    first, ties kept in list order. Patterns with an order of 0 or less
+    never win, so they are left out.
+    """
+    return sorted((p for p in patterns if p.order > 0), key=lambda p: -p.order)
+
 
-def basic_parser(patterns, with_name=None):
+def basic_parser(patterns, with_name=None, early_exit=False):
     """ Basic ordered parser.
+
+    Only the patterns whose required literals occur in a line are run.
+    Patterns with an ``order`` of 0 or less never win, so they aren't run
+    (or compiled) at all.
+    With ``early_exit`` the patterns are tried highest ``order`` first and
+    parsing stops at the first one that yields results. A pattern's parsing
+    functions only run once a plain ``search`` has found a match. The output
+    doesn't change, use ``functools.partial(basic_parser, early_exit=True)``
+    as a ``parser_type``.
     """
+    if early_exit:
+        return _early_exit_parser(ranked_patterns(patterns), with_name)
+    index = LiteralIndex(p for p in patterns if p.order > 0)
+
     def parse(line):
         output = None
         highest_order = 0
         highest_pattern_name = None
-        for pattern in patterns:
+        for pattern in index.candidates(line):
             results = pattern.findall(line)
             if results and any(results):
                 if pattern.order > highest_order:
@@ -24,21 +56,95 @@ def basic_parser(patterns, with_name=None):
     return parse
 
 
+def _early_exit_parser(ranked, with_name):
+    index = LiteralIndex(ranked)
+
+    def parse(line):
+        for pattern in index.candidates(line):
+            if pattern.pattern.search(line) is None:
+                continue
+            results = pattern.findall(line)
+            if results and any(results):
+                if with_name:
+                    return results, pattern.name
+                return results
+        if with_name:
+            return None, None
+        return None
+
+    return parse
+
+
+def combined_parser(patterns, with_name=None):
+    """ Ordered parser that scans each line once for all patterns.
+
+    Patterns are compiled into one alternation, highest ``order`` first,
+    and every match is sent to the function tree of the pattern that made it.
+    The output is the same as ``basic_parser``'s. If the patterns can't be
+    joined into one regex (named groups or backreferences), this falls back
+    to ``basic_parser``.
+    """
+    ranked = ranked_patterns(patterns)
+    if not ranked:
+        # Nothing can win, and an empty alternation would match everywhere
+        return lambda line: (None, None) if with_name else None
+    try:
+        combined = CombinedExpression(ranked)
+        combined.pattern
+    except InvalidPattern:
+        return basic_parser(patterns, with_name)
+
+    def _findall(rank, matches):
+        # No pattern ranked above ``rank`` matches anywhere, so ``matches``
+        # are the ones its own findall would find.
+        pattern = ranked[rank]
+        output = []
+        for match in matches:
+            if match.start() == match.end():
+                # Empty matches follow subtler findall rules
+                return pattern.findall(match.string)
+            Expression._list_add(output, pattern.run(combined.branch(match)[1]))
+        return output
+
+    def parse(line):
+        output = None
+        highest_pattern_name = None
+        first, matches = combined.top_matches(line)
+        if first is not None:
+            candidates = [_findall(first, matches)]
+            # Higher ranked results came out empty; any lower ranked pattern
+            # may have been hidden by them, so check the rest one by one.
+            candidates = itertools.chain(candidates, (p.findall(line) for p in ranked[first + 1:]))
+            for rank, results in enumerate(candidates, first):
+                if results and any(results):
+                    output = results
+                    highest_pattern_name = ranked[rank].name
+                    break
+        if with_name:
+            return output, highest_pattern_name
+        return output
+
+    return parse
+
+
 def alt_parser(patterns):
     """ This parser is able to handle multiple different patterns
         finding stuff in text-- while removing matches that overlap.
+
+        Matches of higher ``order`` patterns replace the ones they overlap;
+        overlaps are resolved with ``reparse.util.remove_overlapping``.
     """
-    from reparse.util import remove_lower_overlapping
-    get_first = lambda items: [i[0] for i in items]
-    get_second = lambda items: [i[1] for i in items]
+    from reparse.util import remove_overlapping
+    index = LiteralIndex(patterns)
 
     def parse(line):
         output = []
-        for pattern in patterns:
+        for pattern in index.candidates(line):
             results = pattern.scan(line)
             if results and any(results):
                 output.append((pattern.order, results))
-        return get_first(reduce(remove_lower_overlapping, get_second(sorted(output)), []))
+        output.sort(key=lambda item: item[0])
+        return [match[0] for match in remove_overlapping(results for _, results in output)]
 
     return parse
 
@@ -60,34 +166,162 @@ def build_tree_parser(patterns):
     return list(output())
 
 
+class PicklableParser(object):
+    """ ``parser_type(patterns)`` that can be pickled, e.g. to be sent to
+    worker processes.
+
+    It is pickled as ``parser_type`` and ``patterns``: user functions by
+    their importable names, the functions ``build_all`` wraps them in by
+    kind (see ``reparse.builders``). Unpickling runs ``parser_type`` again
+    over the patterns without reading or building any YAML, so the
+    functions and ``parser_type`` must be importable where it's unpickled.
+    Pass ``parse`` when ``parser_type(patterns)`` has already been run.
+
+    Other attributes are the parse function's (``info`` of a ``LineCache``...).
+
+    >>> import pickle
+    >>> from reparse.builders import build_all
+    >>> parse = PicklableParser(basic_parser, build_all(
+    ...     {'Id': {'Pattern': 'id=<Digits>', 'Order': 1}},
+    ...     {'Digits': {'Digits': {'Expression': r'(\\d+)', 'Groups': ['Value']}}},
+    ...     {'Value': int},
+    ... ))
+    >>> pickle.loads(pickle.dumps(parse))('id=12 id=3')
+    [[12], [3]]
+    """
+
+    def __init__(self, parser_type, patterns, parse=None):
+        self.parser_type = parser_type
+        self.patterns = patterns
+        self.parse = parser_type(patterns) if parse is None else parse
+
+    def __call__(self, line):
+        return self.parse(line)
+
+    def __getattr__(self, name):
+        if name == 'parse':
+            raise AttributeError(name)
+        return getattr(self.parse, name)
+
+    def __getstate__(self):
+        return {'parser_type': self.parser_type, 'patterns': self.patterns}
+
+    def __setstate__(self, state):
+        self.__init__(state['parser_type'], state['patterns'])
+
+
+def iter_lines(parse, lines):
+    """ Lazily run a parser over ``lines``, yielding ``(line_number, offset, result)``
+    for every line as it is parsed.
+
+    ``parse`` is any line parser, such as the ones ``parser()`` returns.
+    Line numbers start at 1 and ``offset`` is where the line starts in the
+    input (in characters for text and in bytes for bytes).
+
+    >>> list(iter_lines(len, ['ab\\n', 'c\\n']))
+    [(1, 0, 3), (2, 3, 2)]
+    """
+    offset = 0
+    for line_number, line in enumerate(lines, 1):
+        yield line_number, offset, parse(line)
+        offset += len(line)
+
+
+def iter_file(parse, f, encoding='utf-8'):
+    """ ``iter_lines`` over the lines of the file ``f``.
+
+    ``f`` may also be a path or a file descriptor, the file is then memory
+    mapped and offsets are in bytes (see ``reparse.mapped``). Lines are
+    decoded with ``encoding``, pass ``None`` to parse bytes with bytes patterns.
+    """
+    from reparse.mapped import is_file_source, iter_mapped
+    if is_file_source(f):
+        return iter_mapped(parse, f, encoding)
+    return iter_lines(parse, f)
+
+
 def parser(parser_type=basic_parser, functions=None, patterns=None, expressions=None, patterns_yaml_path=None,
-           expressions_yaml_path=None):
+           expressions_yaml_path=None, cache_dir=None, engine=None, compiled=False, line_cache_size=None,
+           line_cache_copy=True, eager=False):
     """ A RE|PARSE parser description.
         Simply provide the functions, patterns, & expressions to build.
         If you are using YAML for expressions + patterns, you can use
         ``expressions_yaml_path`` & ``patterns_yaml_path`` for convenience.
 
+        With ``cache_dir`` the built patterns are cached on disk, keyed by
+        the YAML contents and the reparse version (see ``reparse.cache``).
+        Later calls with the same YAML skip loading, validating and building
+        it; only the functions are bound again by name.
+
+        ``engine`` names the regex engine the parser compiles with
+        (see ``reparse.engines``).
+
+        With ``compiled`` every pattern runs through generated Python
+        (see ``reparse.codegen``) rather than its plan.
+
+        With ``line_cache_size`` the parser remembers the results of that
+        many recent lines (see ``reparse.memo``). Cached results are copied
+        for every caller; with ``line_cache_copy=False`` they are shared,
+        which is faster but they must then not be changed.
+
+        With ``eager`` every regex is compiled while building rather than
+        on first use, which suits threaded use (see ``reparse.threads``).
+
+        Parsers (anything callable ``parser_type`` makes) can be pickled,
+        see ``PicklableParser``.
+
         The default parser_type is the basic ordered parser.
     """
-    from reparse.builders import build_all
-    from reparse.validators import validate
-
-    def _load_yaml(file_path):
-        import yaml
-        with open(file_path) as f:
-            return yaml.safe_load(f)
+    def _read(file_path):
+        with open(file_path, 'rb') as f:
+            return f.read()
 
     assert expressions or expressions_yaml_path, "RE|PARSE can't build a parser without expressions"
     assert patterns or patterns_yaml_path, "RE|PARSE can't build a parser without patterns"
     assert functions, "RE|PARSE can't build without a functions"
 
     if patterns_yaml_path:
-        patterns = _load_yaml(patterns_yaml_path)
+        patterns = _read(patterns_yaml_path)
     if expressions_yaml_path:
-        expressions = _load_yaml(expressions_yaml_path)
-    validate(patterns, expressions)
+        expressions = _read(expressions_yaml_path)
+
+    if cache_dir:
+        from reparse import cache
+        key = cache.cache_key(patterns, expressions, get_engine(engine).name)
+        built = cache.load(cache_dir, key, functions, engine)
+        if built is None:
+            built = _build(patterns, expressions, functions, engine)
+            cache.store(cache_dir, key, built)
+    else:
+        built = _build(patterns, expressions, functions, engine)
+
+    if eager:
+        from reparse.threads import compile_all
+        compile_all(built)
+    if compiled:
+        from reparse.codegen import compile_patterns
+        compile_patterns(built)
+    if line_cache_size:
+        from reparse.memo import memoized
+        parser_type = memoized(parser_type, line_cache_size, copy=copy.deepcopy if line_cache_copy else None)
+    parse = parser_type(built)
+    if callable(parse):
+        return PicklableParser(parser_type, built, parse)
+    return parse
+
 
-    return parser_type(build_all(patterns, expressions, functions))
+def _build(patterns, expressions, functions, engine):
+    """ Load (if still YAML), validate and build patterns. """
+    import yaml
+    from reparse.builders import build_all
+    from reparse.validators import validate
+
+    if isinstance(patterns, (bytes, str)):
+        patterns = yaml.safe_load(patterns)
+    if isinstance(expressions, (bytes, str)):
+        expressions = yaml.safe_load(expressions)
+    validate(patterns, expressions)
+    return build_all(patterns, expressions, functions, engine)
 
 
 class Parser(object):
@@ -98,6 +332,12 @@ class Parser(object):
 
     Args:
         expresions: multiple instances of Expression.
+        engine: name of the regex engine for expressions that don't name
+            their own (see ``reparse.engines``).
+        line_cache_size: remember the results of that many recent lines
+            (see ``reparse.memo``), off by default.
+        line_cache_copy: copy cached results for every caller (the
+            default); ``False`` shares them, faster but they must not be changed.
 
     Example:
 
@@ -120,8 +360,16 @@ class Parser(object):
 
     """
 
-    def __init__(self, *expressions):
+    def __init__(self, *expressions, engine=None, line_cache_size=None, line_cache_copy=True):
+        if engine is not None:
+            for expression in expressions:
+                if expression.engine is None:
+                    expression.engine = engine
         self.expressions = expressions
+        self._index = LiteralIndex(expressions)
+        if line_cache_size:
+            from reparse.memo import LineCache
+            self.line = LineCache(self.line, line_cache_size, copy.deepcopy if line_cache_copy else None)
 
     def line(self, line):
         """Returns a dictionary of results processed by all expressions.
@@ -133,7 +381,7 @@ class Parser(object):
             dict: {expression.name: result}
         """
         output = {}
-        for expression in self.expressions:
+        for expression in self._index.candidates(line):
             # one expresion can yield multiple matches, or None
             for res in expression.findall(line):
                 output = self.merge_output(
@@ -144,17 +392,58 @@ class Parser(object):
                 )
         return output
 
-    def parse_file(self, f):
+    def parse_file(self, f, workers=None, chunk_size=None, encoding='utf-8'):
         """Calls self.line for each line in file. Composes dict of data
         returned by expressions for each line in a file.
 
+        ``f`` is a file object, a path or a file descriptor; paths and file
+        descriptors are memory mapped and decoded with ``encoding``.
+
+        With ``workers`` the file is split into line aligned chunks of
+        ``chunk_size`` bytes that are parsed by a pool of ``workers``
+        processes (see ``reparse.parallel``); ``f`` must then be a path or
+        a file opened from one, anything else raises ``ValueError``. The
+        output is the same.
         """
+        if workers:
+            from reparse.parallel import default_chunk_size, parse_file_parallel
+            return parse_file_parallel(
+                self, f, workers, chunk_size or default_chunk_size, getattr(f, 'encoding', encoding)
+            )
         final_output = {}
-        for line in f:
-            output = self.line(line)
+        for _, _, output in self.iter_file(f, encoding):
             self.merge_output(final_output, output)
         return final_output
 
+    def parse_many(self, lines, workers=None):
+        """Returns the result of ``self.line`` for each of ``lines``, parsed by
+        ``workers`` threads (see ``reparse.threads``). Expressions are compiled
+        first; use the ``'regex-concurrent'`` engine to match in parallel.
+
+        >>> parser = Parser(SimpleExpression('n', r'(\\d+)', int), engine='regex-concurrent')
+        >>> parser.parse_many(['a 1', 'b', '22'], workers=2)
+        [{'n': 1}, {}, {'n': 22}]
+        """
+        from reparse.threads import compile_all, parse_many
+        compile_all(self.expressions)
+        return parse_many(self.line, lines, workers)
+
+    def iter_lines(self, lines):
+        """Yields ``(line_number, offset, result)`` for each of ``lines``
+        as it is parsed, see ``reparse.parsers.iter_lines``.
+
+        >>> parser = Parser(SimpleExpression('n', r'(\\d+)', int))
+        >>> list(parser.iter_lines(['a 1\\n', 'b\\n']))
+        [(1, 0, {'n': 1}), (2, 4, {})]
+        """
+        return iter_lines(self.line, lines)
+
+    def iter_file(self, f, encoding='utf-8'):
+        """Like ``iter_lines``, over the lines of the file ``f``, which can
+        also be a memory mapped path or file descriptor (see ``reparse.parsers.iter_file``).
+        """
+        return iter_file(self.line, f, encoding)
+
     def merge_output(self, result, part):
         """Merges two dictionaries in a way that no data is lost.
 
@@ -0,0 +1,85 @@
+""" Flat execution plans for built patterns.
+
+A built pattern is a tree: every ``Expression`` slices the groups of a match
+between its group functions, and some of those are the ``run`` of a child
+``Expression`` that slices its share again. ``Plan`` walks that tree once,
+at build time, and records every function with the absolute range of groups
+it gets, in the bottom-up order ``Expression.run`` calls them. Running a plan
+is then a loop of indexed calls over a value stack.
+"""
+from reparse.expression import Expression
+
+
+def _child(function):
+    """ The ``Expression`` whose ``run`` is ``function``, if it is one. """
+    child = getattr(function, '__self__', None)
+    if isinstance(child, Expression) and function.__name__ == 'run':
+        return child
+
+
+class Plan(object):
+    """ The function tree of ``expression`` as a list of steps.
+
+    A step is ``(function, start, end, None)`` for a group function, which
+    is called with ``matches[start:end]``, or ``(final_function, None, None,
+    arity)`` for an expression, which is called with the last ``arity``
+    results. ``nodes`` lists every expression of the tree as
+    ``(expression, first step, last step, parent expression)``.
+
+    >>> first = lambda g: g[0]
+    >>> inner = Expression('(a)(b)', [first, first], [1, 1], ''.join)
+    >>> outer = Expression('(x)(?:(a)(b))', [first, inner.run], [1, 2], tuple)
+    >>> plan = Plan(outer)
+    >>> [step[1:] for step in plan.steps]
+    [(0, 1, None), (1, 2, None), (2, 3, None), (None, None, 2), (None, None, 2)]
+    >>> plan(('x', 'a', 'b')) == outer.run(('x', 'a', 'b')) == ('x', 'ab')
+    True
+    """
+
+    def __init__(self, expression):
+        self.steps = []
+        self.nodes = []
+        self._add(expression, 0, None, None)
+
+    def _add(self, expression, start, end, parent):
+        first_step = len(self.steps)
+        position = start
+        arity = 0
+        for length, function in zip(expression.group_lengths, expression.group_functions):
+            group_start, group_end = position, position + length
+            if end is not None:
+                # a child only sees the groups its parent sliced for it
+                group_start, group_end = min(group_start, end), min(group_end, end)
+            child = _child(function)
+            if child is None:
+                self.steps.append((function, group_start, group_end, None))
+            else:
+                self._add(child, group_start, group_end, expression)
+            position += length
+            arity += 1
+        self.steps.append((expression.final_function, None, None, arity))
+        self.nodes.append((expression, first_step, len(self.steps) - 1, parent))
+
+    def __call__(self, matches):
+        stack = []
+        for function, start, end, arity in self.steps:
+            if arity is None:
+                stack.append(function(matches[start:end]))
+            elif arity:
+                results = stack[-arity:]
+                del stack[-arity:]
+                stack.append(function(results))
+            else:
+                stack.append(function([]))
+        return stack[0]
+
+
+def plan_of(expression):
+    """ The ``Plan`` ``expression`` runs with (the one generated code was
+    made from, if it runs generated code), or a new one.
+    """
+    plan = getattr(expression, 'plan', None)
+    plan = getattr(plan, 'plan', plan)
+    if isinstance(plan, Plan):
+        return plan
+    return Plan(expression)
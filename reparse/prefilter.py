@@ -0,0 +1,193 @@
+""" Literal prefiltering: skip expressions that can't match a string.
+
+Most regexes contain text that every one of their matches has to include,
+``Fax:`` in ``Fax: \\s <Phone>`` for instance. ``required_literals`` pulls
+that text out of a regex and ``LiteralIndex`` scans a string for the
+literals of many expressions at once, telling which expressions are worth
+running at all.
+"""
+import itertools
+import re
+import warnings
+
+from reparse.engines import get_engine
+from reparse.util import sre_parse
+
+
+_repeats = tuple(getattr(sre_parse, op) for op in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT')
+                 if hasattr(sre_parse, op))
+
+# Syntax the ``regex`` module reads differently than the standard library
+# does without complaining: POSIX classes (``[[:alpha:]]``) and fuzzy
+# matching constraints (``(?:foo){e<=1}``)
+_regex_only = re.compile(r'\[:\^?\w+:\]|\{[^{}]*[deis][^{}]*\}')
+
+
+def required_literals(regex, flags=0):
+    """ Literal strings that every match of ``regex`` contains.
+
+    Returns ``(text, ignore_case)`` pairs. Regexes the standard library
+    can't parse, or only parses with a warning or with syntax the ``regex``
+    module means something else by, get no literals, so they are never
+    filtered out.
+
+    >>> required_literals(r'Fax:\\s(\\d+)')
+    [('Fax:', False)]
+    >>> required_literals(r'(?i)id=(\\d+)(?:ms)?')
+    [('id=', True)]
+    >>> required_literals(r'(red|blue)+ car')
+    [(' car', False)]
+    >>> required_literals(r'([[:alpha:]]+)')
+    []
+    """
+    text = regex.decode('latin-1') if isinstance(regex, bytes) else regex
+    if _regex_only.search(text):
+        return []
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        try:
+            parsed = sre_parse.parse(regex, flags)
+        except Exception:
+            return []
+    if caught:
+        return []
+    literals = []
+    _collect(parsed, bool(parsed.state.flags & sre_parse.SRE_FLAG_IGNORECASE), literals)
+    return literals
+
+
+def _collect(subpattern, ignore_case, literals):
+    run = []
+
+    def end_run():
+        if run:
+            literals.append(("".join(run), ignore_case))
+            del run[:]
+
+    for op, av in subpattern:
+        if op == sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        end_run()
+        if op == sre_parse.SUBPATTERN:
+            _, add_flags, del_flags, content = av
+            if add_flags & sre_parse.SRE_FLAG_IGNORECASE:
+                _collect(content, True, literals)
+            elif del_flags & sre_parse.SRE_FLAG_IGNORECASE:
+                _collect(content, False, literals)
+            else:
+                _collect(content, ignore_case, literals)
+        elif op in _repeats and av[0] >= 1:
+            _collect(av[2], ignore_case, literals)
+        elif op == getattr(sre_parse, 'ATOMIC_GROUP', None):
+            _collect(av, ignore_case, literals)
+    end_run()
+
+
+def _best_literal(literals):
+    """ The longest literal is usually the rarest one. """
+    if literals:
+        return max(literals, key=lambda literal: len(literal[0]))
+
+
+def _may_share_prefix(prefix, text):
+    """ Could a string matched by literal ``text`` start with a match of ``prefix``? """
+    (prefix_text, prefix_case), (text_text, text_case) = prefix, text
+    if len(prefix_text) > len(text_text):
+        return False
+    if not (prefix_case or text_case):
+        return text_text.startswith(prefix_text)
+    for a, b in zip(prefix_text, text_text):
+        # Case folding of non-ASCII letters is subtle, assume they can match
+        if a.lower() != b.lower() and a.isascii() and b.isascii():
+            return False
+    return True
+
+
+class LiteralIndex(object):
+    """ Multi-string index over the required literals of ``expressions``.
+
+    ``candidates`` returns, in their original order, the expressions that
+    could match a string: the ones whose longest required literal occurs in
+    it, plus the ones without any. All literals are found in one scan with
+    a lookahead alternation, longest literals first; shorter literals that
+    start at the same place are checked right after.
+
+    >>> from reparse.expression import SimpleExpression
+    >>> fax = SimpleExpression('fax', r'Fax: \\s (\\d+)', int)
+    >>> phone = SimpleExpression('phone', r'(\\d+)', int)
+    >>> index = LiteralIndex([fax, phone])
+    >>> [e.name for e in index.candidates('call 555')]
+    ['phone']
+    >>> [e.name for e in index.candidates('Fax: 555')]
+    ['fax', 'phone']
+    """
+
+    def __init__(self, expressions):
+        self.expressions = list(expressions)
+        self._always = []
+        literal_ids = {}
+        literals = []
+        self._owners = []
+        for i, expression in enumerate(self.expressions):
+            literal = getattr(expression, 'literals', None)
+            if literal is None:
+                engine = get_engine(getattr(expression, 'engine', None))
+                literal = required_literals(expression.regex, engine.re_flags_of(expression))
+            literal = _best_literal(literal)
+            if literal is None:
+                self._always.append(i)
+                continue
+            if literal not in literal_ids:
+                literal_ids[literal] = len(literals)
+                literals.append(literal)
+                self._owners.append([])
+            self._owners[literal_ids[literal]].append(i)
+
+        self._scanner = None
+        regex_types = set(type(self.expressions[i].regex) for i in itertools.chain.from_iterable(self._owners))
+        if len(regex_types) > 1:
+            # A scanner can't search both str and bytes, so run everything
+            self._always = list(range(len(self.expressions)))
+            literals = []
+        if literals:
+            self._prefixes = [
+                [j for j, prefix in enumerate(literals) if j != i and _may_share_prefix(prefix, literal)]
+                for i, literal in enumerate(literals)
+            ]
+            if regex_types == {bytes}:
+                literals = [(text.encode('latin-1'), ignore_case) for text, ignore_case in literals]
+            by_length = sorted(range(len(literals)), key=lambda i: -len(literals[i][0]))
+            self._group_literal = [None] + by_length
+            branches = [_literal_regex(literals[i]) for i in by_length]
+            if regex_types == {bytes}:
+                self._scanner = re.compile(b'(?=(' + b')|('.join(branches) + b'))')
+            else:
+                self._scanner = re.compile('(?=(' + ')|('.join(branches) + '))')
+            self._matchers = [re.compile(_literal_regex(literal)) for literal in literals]
+
+    def candidates(self, string):
+        """ Expressions that could match ``string``, in their original order. """
+        if self._scanner is None:
+            return self.expressions
+        found = set()
+        for match in self._scanner.finditer(string):
+            literal = self._group_literal[match.lastindex]
+            found.add(literal)
+            for prefix in self._prefixes[literal]:
+                if prefix not in found and self._matchers[prefix].match(string, match.start()):
+                    found.add(prefix)
+        if not found:
+            return [self.expressions[i] for i in self._always]
+        indexes = list(self._always)
+        for literal in found:
+            indexes.extend(self._owners[literal])
+        return [self.expressions[i] for i in sorted(indexes)]
+
+
+def _literal_regex(literal):
+    text, ignore_case = literal
+    regex = re.escape(text)
+    if ignore_case:
+        regex = b'(?i:' + regex + b')' if isinstance(text, bytes) else '(?i:' + regex + ')'
+    return regex
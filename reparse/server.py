@@ -0,0 +1,314 @@
+""" A local parse daemon.
+
+Building a parser means reading YAML, building and compiling every pattern,
+which short-lived scripts pay for on every run. ``ParseServer`` does it
+once: it compiles its parsers up front, freezes the heap (``gc.freeze``,
+so the garbage collector doesn't touch, and copy, the shared pages) and
+forks ``workers`` processes that share the built parsers copy-on-write.
+Each worker takes connections on one UNIX socket and parses the batches of
+lines sent over them; ``Client`` is the other end.
+
+Every message is a 4 byte big-endian length followed by that many bytes.
+A request is JSON, ``{"parser": name, "format": "json" | "pickle",
+"lines": [...]}``. A response starts with ``+`` and holds the results,
+one JSON document per line or a pickled list, or starts with ``-`` and
+holds an error message. The server never unpickles anything, but clients
+do unpickle what it sends: only talk pickle to a server you trust.
+
+Example Usage::
+
+    python -m reparse.server /tmp/reparse.sock \\
+        --parser phone expressions.yaml patterns.yaml my.functions --workers 4
+
+    with Client('/tmp/reparse.sock', 'phone') as parse:
+        results = parse.parse_many(lines)
+"""
+import argparse
+import gc
+import importlib
+import json
+import os
+import pickle
+import signal
+import socket
+import stat
+import struct
+import sys
+
+from reparse.threads import compile_all
+
+default_batch_size = 1024
+default_timeout = 60
+
+_length = struct.Struct('!I')
+
+
+class ServerError(Exception):
+    """ The server couldn't parse a batch, with the reason it gave. """
+    pass
+
+
+def dumps_result(result):
+    """ ``result`` as one line of JSON; values JSON doesn't know are written as strings.
+
+    >>> import datetime
+    >>> dumps_result([['Green', datetime.time(20, 0)]])
+    '[["Green", "20:00:00"]]'
+    """
+    return json.dumps(result, default=str)
+
+
+def _send(sock, payload):
+    sock.sendall(_length.pack(len(payload)) + payload)
+
+
+def _receive_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _receive(sock):
+    """ The next message, or ``None`` once the other end has closed. """
+    header = _receive_exactly(sock, _length.size)
+    if header is None:
+        return None
+    return _receive_exactly(sock, _length.unpack(header)[0])
+
+
+def _remove_socket(path):
+    """ Remove the (stale) socket at ``path``, refusing to remove anything else. """
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ValueError("[{}] exists and isn't a socket".format(path))
+    os.unlink(path)
+
+
+def _patterns(parse):
+    """ The expressions a parse function (``reparse.parser``) or ``Parser`` runs. """
+    return getattr(parse, 'patterns', None) or getattr(parse, 'expressions', None) or ()
+
+
+class _Stop(Exception):
+    pass
+
+
+class ParseServer(object):
+    """ Serve ``parsers``, a dict of names to parse functions (made by
+    ``reparse.parser`` or ``Parser`` instances), on the UNIX socket at
+    ``path`` with ``workers`` processes (one per CPU by default).
+
+    ``serve_forever`` runs until the process gets SIGTERM or SIGINT;
+    ``start`` and ``stop`` run the workers in the background instead.
+    Workers that die are replaced by ``serve_forever``.
+    """
+
+    def __init__(self, path, parsers, workers=None, backlog=128):
+        self.path = path
+        self.parsers = dict(parsers)
+        self.workers = workers or os.cpu_count() or 1
+        self.backlog = backlog
+        self._socket = None
+        self._pids = set()
+
+    def start(self):
+        """ Compile, freeze and fork the workers. Returns once they're running. """
+        for parse in self.parsers.values():
+            compile_all(_patterns(parse))
+        _remove_socket(self.path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.bind(self.path)
+        self._socket.listen(self.backlog)
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+        for _ in range(self.workers):
+            self._fork()
+
+    def serve_forever(self):
+        """ ``start``, then wait, replacing workers that die, until SIGTERM or SIGINT. """
+        def _stop(signum, frame):
+            raise _Stop()
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+        try:
+            self.start()
+            while True:
+                try:
+                    pid, _ = os.wait()
+                except ChildProcessError:
+                    break
+                self._pids.discard(pid)
+                self._fork()
+        except _Stop:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        """ Stop the workers and remove the socket. """
+        for pid in self._pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+        for pid in self._pids:
+            try:
+                os.waitpid(pid, 0)
+            except OSError:
+                pass
+        self._pids.clear()
+        if hasattr(gc, 'unfreeze'):
+            gc.unfreeze()
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+            _remove_socket(self.path)
+
+    def _fork(self):
+        pid = os.fork()
+        if pid:
+            self._pids.add(pid)
+            return
+        # The worker: never return into the caller's code
+        status = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            self._work()
+        except BaseException:
+            status = 1
+        finally:
+            os._exit(status)
+
+    def _work(self):
+        while True:
+            connection, _ = self._socket.accept()
+            with connection:
+                try:
+                    while True:
+                        request = _receive(connection)
+                        if request is None:
+                            break
+                        _send(connection, self.respond(request))
+                except OSError:
+                    # The client went away (or broke the connection); serve the next one
+                    pass
+
+    def respond(self, request):
+        """ The response to one request message. """
+        try:
+            request = json.loads(request.decode('utf-8'))
+            if request.get('parser') not in self.parsers:
+                return b'-' + 'Unknown parser [{}]'.format(request.get('parser')).encode('utf-8')
+            parse = self.parsers[request['parser']]
+            results = [parse(line) for line in request['lines']]
+            if request.get('format', 'json') == 'pickle':
+                return b'+' + pickle.dumps(results, pickle.HIGHEST_PROTOCOL)
+            return b'+' + '\n'.join(dumps_result(result) for result in results).encode('utf-8')
+        except Exception as e:
+            return b'-' + '{}: {}'.format(type(e).__name__, e).encode('utf-8')
+
+
+class Client(object):
+    """ Parses lines with the parser called ``parser`` on the server at ``path``.
+
+    Lines are sent in batches of ``batch_size``. With ``format='pickle'``
+    results come back as the parser made them; with ``'json'`` as JSON
+    decodes them (tuples become lists, values JSON doesn't know strings).
+
+    A batch that gets no response within ``timeout`` seconds raises
+    ``socket.timeout`` and closes the connection; ``None`` waits forever.
+    """
+
+    def __init__(self, path, parser, batch_size=default_batch_size, format='pickle', timeout=default_timeout):
+        self.path = path
+        self.parser = parser
+        self.batch_size = batch_size
+        self.format = format
+        self.timeout = timeout
+        self._socket = None
+
+    def _connection(self):
+        if self._socket is None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(self.timeout)
+            self._socket.connect(self.path)
+        return self._socket
+
+    def _parse_batch(self, lines):
+        sock = self._connection()
+        request = {'parser': self.parser, 'format': self.format, 'lines': lines}
+        try:
+            _send(sock, json.dumps(request).encode('utf-8'))
+            response = _receive(sock)
+        except OSError:
+            # A response may still be on its way, the connection can't be reused
+            self.close()
+            raise
+        if response is None:
+            self.close()
+            raise ServerError("The server closed the connection")
+        if response[:1] == b'-':
+            raise ServerError(response[1:].decode('utf-8'))
+        if self.format == 'pickle':
+            return pickle.loads(response[1:])
+        if not lines:
+            return []
+        return [json.loads(line) for line in response[1:].decode('utf-8').split('\n')]
+
+    def parse_many(self, lines):
+        """ The results of ``lines``, in order. """
+        lines = list(lines)
+        output = []
+        for start in range(0, len(lines), self.batch_size):
+            output.extend(self._parse_batch(lines[start:start + self.batch_size]))
+        return output
+
+    def __call__(self, line):
+        return self._parse_batch([line])[0]
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(argv=None):
+    import reparse
+    arguments = argparse.ArgumentParser(prog='python -m reparse.server', description="Serve reparse parsers.")
+    arguments.add_argument('path', help="UNIX socket to listen on")
+    arguments.add_argument('--parser', nargs=4, action='append', required=True,
+                           metavar=('NAME', 'EXPRESSIONS', 'PATTERNS', 'FUNCTIONS'),
+                           help="name, YAML paths and functions module of a parser to serve")
+    arguments.add_argument('--parser-type', default='basic_parser',
+                           choices=['basic_parser', 'combined_parser', 'alt_parser'])
+    arguments.add_argument('--engine', help="regex engine (see reparse.engines)")
+    arguments.add_argument('--workers', type=int, help="worker processes, one per CPU by default")
+    args = arguments.parse_args(argv)
+    parsers = {}
+    for name, expressions, patterns, functions in args.parser:
+        parsers[name] = reparse.parser(
+            parser_type=getattr(reparse, args.parser_type), expressions_yaml_path=expressions,
+            patterns_yaml_path=patterns, functions=importlib.import_module(functions).functions, engine=args.engine,
+        )
+    ParseServer(args.path, parsers, args.workers).serve_forever()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+""" Matching across chunks of a stream.
+
+Parsers work line by line, so a match can't span lines, and scanning a
+whole document at once means holding all of it in memory. ``StreamScanner``
+scans a stream chunk by chunk with the patterns joined into one alternation
+(see ``reparse.expression.CombinedExpression``). It uses the ``regex``
+module's partial matching to tell which matches near the end of a chunk
+might still go on in the next one. It holds those back, carrying the text
+they start at over to the next chunk, and reports every other match with
+its offset in the whole stream.
+
+Memory use is bounded by the chunk size plus ``max_carry``. A match
+longer than ``max_carry`` can't be carried, so it is only found if it
+fits in one chunk along with the carried text.
+
+Example Usage::
+
+    with open('export.txt') as f:
+        for start, end, name, result in scan_stream(patterns, iter_chunks(f)):
+            ...
+"""
+import re
+
+from reparse.expression import CombinedExpression
+from reparse.parsers import ranked_patterns
+
+default_chunk_size = 1024 * 1024
+default_max_carry = 64 * 1024
+
+
+def iter_chunks(f, chunk_size=default_chunk_size):
+    """ Read the file ``f`` in chunks of ``chunk_size``. """
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+class StreamScanner(object):
+    """ Finds the matches of ``patterns`` (as returned by ``build_all``) in
+    a stream of text fed to it in chunks.
+
+    ``feed`` and ``close`` return ``(start, end, pattern name, result)``
+    for every match that's settled, in stream order. Matches don't overlap.
+    Where several patterns match at the same place, the one with the
+    highest ``order`` wins. Patterns with an order of 0 or less are left
+    out, as in ``basic_parser``. Matches whose parsing functions give
+    ``None`` are skipped.
+
+    ``context`` characters before the carried text are kept too, so that
+    lookbehinds and ``\\b`` see what came before it. ``^`` and ``$`` only
+    match at the start and end of the stream.
+
+    The patterns must compile with a ``regex`` engine and must not hold
+    named groups or backreferences (``InvalidPattern``).
+    """
+
+    def __init__(self, patterns, max_carry=default_max_carry, context=1):
+        self.patterns = ranked_patterns(patterns)
+        self.combined = CombinedExpression(self.patterns)
+        if isinstance(self.combined.pattern, re.Pattern):
+            raise ValueError("Matching across chunks needs a regex engine with partial matching, not re")
+        self.max_carry = max_carry
+        self.context = context
+        self._carry = None
+        # where the carry starts in the stream, and where scanning resumes in it
+        self._offset = 0
+        self._pos = 0
+
+    def feed(self, chunk):
+        """ Scan the next chunk of the stream. """
+        buffer = chunk if self._carry is None else self._carry + chunk
+        return self._scan(buffer, final=False)
+
+    def close(self):
+        """ The matches left in the carried text, at the end of the stream. """
+        if self._carry is None:
+            return []
+        matches = self._scan(self._carry, final=True)
+        self._carry = None
+        return matches
+
+    def _settled(self, buffer, match):
+        """ Whether no more of the stream could change ``match``. """
+        if match.partial:
+            return False
+        if match.start() < len(buffer) - self.max_carry:
+            return True
+        # A longer match, or one of a higher branch, could still start here
+        return self.combined.pattern.fullmatch(buffer, match.start(), partial=True) is None
+
+    def _scan(self, buffer, final):
+        matches = []
+        carry_from = len(buffer)
+        for match in self.combined.pattern.finditer(buffer, self._pos, partial=not final):
+            if not final and not self._settled(buffer, match):
+                carry_from = match.start()
+                break
+            if match.start() == match.end():
+                continue
+            index, groups = self.combined.branch(match)
+            result = self.patterns[index].run(groups)
+            if result is not None:
+                matches.append(
+                    (self._offset + match.start(), self._offset + match.end(), self.patterns[index].name, result)
+                )
+        carry_from = max(carry_from, len(buffer) - self.max_carry)
+        keep = max(carry_from - self.context, 0)
+        self._carry = buffer[keep:]
+        self._offset += keep
+        self._pos = carry_from - keep
+        return matches
+
+
+def scan_stream(patterns, chunks, max_carry=default_max_carry, context=1):
+    """ Yield the matches of ``patterns`` in ``chunks``, see ``StreamScanner``.
+
+    >>> from reparse.builders import build_all
+    >>> patterns = build_all(
+    ...     {'Total': {'Pattern': r'total:\\s+<Digits>', 'Order': 1}},
+    ...     {'Digits': {'Digits': {'Expression': r'(\\d+)', 'Groups': ['Value']}}},
+    ...     {'Value': int},
+    ... )
+    >>> list(scan_stream(patterns, ['a total:', '\\n 12', '3; total: 4']))
+    [(2, 13, 'Total', [[123]]), (15, 23, 'Total', [[4]])]
+    """
+    scanner = StreamScanner(patterns, max_carry, context)
+    for chunk in chunks:
+        for match in scanner.feed(chunk):
+            yield match
+    for match in scanner.close():
+        yield match
@@ -0,0 +1,60 @@
+""" Thread-parallel parsing.
+
+With the ``'regex-concurrent'`` engine (see ``reparse.engines``) regexes
+match with the GIL released, so several threads parsing at once overlap
+their matching; the parsing functions still take turns. Expressions compile
+once, under a lock, but ``compile_all`` compiles them up front so the first
+lines don't wait on each other.
+
+Example Usage::
+
+    parse = reparse.parser(..., engine='regex-concurrent', eager=True)
+    results = parse_many(parse, lines, workers=4)
+"""
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+default_batch_size = 256
+
+
+def compile_all(expressions):
+    """ Compile (and optimize) the regexes of ``expressions`` now rather
+    than on first use. Returns ``expressions``.
+    """
+    for expression in expressions:
+        expression.pattern
+    return expressions
+
+
+def iter_batches(lines, batch_size):
+    """ Lists of ``batch_size`` consecutive ``lines``, the last one shorter if need be.
+
+    >>> list(iter_batches('abcde', 2))
+    [['a', 'b'], ['c', 'd'], ['e']]
+    """
+    lines = iter(lines)
+    while True:
+        batch = list(itertools.islice(lines, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def parse_batch(parse, batch):
+    """ ``parse`` of every line of ``batch``, as a list. """
+    return [parse(line) for line in batch]
+
+
+def parse_many(parse, lines, workers=None, batch_size=default_batch_size):
+    """ ``[parse(line) for line in lines]``, parsed by a pool of ``workers``
+    threads in batches of ``batch_size`` lines.
+
+    >>> parse_many(len, ['a', 'bb', 'ccc'], workers=2, batch_size=2)
+    [1, 2, 3]
+    """
+    output = []
+    with ThreadPoolExecutor(workers) as pool:
+        batches = pool.map(parse_batch, itertools.repeat(parse), iter_batches(lines, batch_size))
+        for results in batches:
+            output.extend(results)
+    return output
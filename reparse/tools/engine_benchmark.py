@@ -0,0 +1,95 @@
+"""
+Compares the throughput of the registered regex engines (see
+``reparse.engines``) on the example parsers, or on your own. For the
+broader benchmark suite, see ``reparse.benchmark``.
+
+Each corpus is made of the ``Matches`` and ``Non-Matches`` samples of the
+parser's expressions, padded with some filler text.
+
+Example Usage::
+
+    python -m reparse.tools.engine_benchmark
+    python -m reparse.tools.engine_benchmark --lines 50000 \\
+        my/expressions.yaml my/patterns.yaml my.functions
+"""
+import argparse
+import importlib
+import itertools
+import os
+import time
+
+import yaml
+
+import reparse
+from reparse.benchmark.corpus import expression_samples
+from reparse.engines import engine_names
+
+examples_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'examples')
+examples = [
+    (os.path.join(examples_dir, name, 'expressions.yaml'), os.path.join(examples_dir, name, 'patterns.yaml'),
+     'examples.{}.functions'.format(name))
+    for name in ('phone', 'colortime')
+]
+filler = "lorem ipsum {} dolor sit amet"
+
+
+def samples(expressions):
+    """ The ``Matches`` and ``Non-Matches`` samples of every expression. """
+    for field in ('Matches', 'Non-Matches'):
+        for type_samples in expression_samples(expressions, field).values():
+            for sample in type_samples:
+                yield sample
+
+
+def corpus(expressions, lines):
+    """ ``lines`` lines of filler text around the expression samples. """
+    return [filler.format(sample) for sample in itertools.islice(itertools.cycle(samples(expressions)), lines)]
+
+
+def lines_per_second(parse, lines, repeat=3):
+    """ Throughput of ``parse`` over ``lines``, best of ``repeat`` runs. """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            parse(line)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(lines) / best if best else float('inf')
+
+
+def benchmark(expressions_yaml_path, patterns_yaml_path, functions, lines=10000, engines=None):
+    """ ``{engine: {parser type: lines per second}}`` for one parser. """
+    with open(expressions_yaml_path) as f:
+        text = corpus(yaml.safe_load(f), lines)
+    results = {}
+    for engine in engines or engine_names():
+        results[engine] = {}
+        for parser_type in (reparse.basic_parser, reparse.combined_parser, reparse.alt_parser):
+            parse = reparse.parser(
+                parser_type=parser_type, expressions_yaml_path=expressions_yaml_path,
+                patterns_yaml_path=patterns_yaml_path, functions=functions, engine=engine
+            )
+            results[engine][parser_type.__name__] = lines_per_second(parse, text)
+    return results
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    arguments.add_argument('--lines', type=int, default=10000, help="lines in each corpus")
+    arguments.add_argument('--engine', action='append', choices=engine_names(), help="engines to compare")
+    arguments.add_argument('parser', nargs='*', help="expressions.yaml patterns.yaml functions.module")
+    args = arguments.parse_args(argv)
+    parsers = [tuple(args.parser)] if args.parser else examples
+    for expressions_yaml_path, patterns_yaml_path, functions_module in parsers:
+        functions = importlib.import_module(functions_module).functions
+        results = benchmark(expressions_yaml_path, patterns_yaml_path, functions, args.lines, args.engine)
+        print(os.path.dirname(expressions_yaml_path))
+        for engine, speeds in sorted(results.items()):
+            print("  {:<8}".format(engine) + "".join(
+                "  {}: {:>9.0f} lines/s".format(name, speed) for name, speed in sorted(speeds.items())
+            ))
+
+
+if __name__ == '__main__':
+    main()
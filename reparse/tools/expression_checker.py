@@ -15,14 +15,16 @@ Example Usage::
         def test_coolness(self):
             expression_tester(self, load_yaml("parse/cool/expressions.yaml"))
 """
-from reparse.config import expression_sub
+from reparse.engines import get_engine
 base_error_msg = "Expression Type [{}], Group [{}], "
 match_error_msg = base_error_msg + "Could not match [{}]"
 non_match_error_msg = base_error_msg + "Should not match [{}]"
 
 
-def check_expression(testing_framework, expression_dict):
-    """
+def check_expression(testing_framework, expression_dict, engine=None):
+    """ Check every expression in ``expression_dict`` against its samples,
+    using the same regex ``engine`` parsers use (the default engine if ``None``).
+
     >>> class mock_framework:
     ...   def assertIn(self, item, list, msg="Failed asserting item is in list"):
     ...     if item not in list: raise Exception(msg)
@@ -32,6 +34,7 @@ def check_expression(testing_framework, expression_dict):
     >>> check_expression(mock_framework(),
     ...   {'class': {'group' :{'Matches': " 0 | 1", 'Non-Matches': "2 | 0 2", 'Expression': "[0-1]"}}})
     """
+    expression_sub = get_engine(engine).sub
     for expression_type_name, expression_type in expression_dict.items():
         for name, expression_object in expression_type.items():
             if 'Matches' in expression_object.keys():
@@ -1,5 +1,15 @@
+import bisect
+import heapq
+
 import regex
 
+# The standard library's regex parser, for the modules that read regexes
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+
 def separate_string(string):
     """
     >>> separate_string("test <2>")
@@ -48,3 +58,53 @@ def remove_lower_overlapping(current, higher):
             current.append((match, h_start, h_end))
 
     return current
+
+
+def remove_overlapping(groups):
+    """ Like folding ``remove_lower_overlapping`` over ``groups``, in
+    O(n log n) per group.
+
+    ``groups`` holds lists of ``(match, start, end)``, lowest priority first,
+    whose matches don't overlap each other (as ``Expression.scan`` gives
+    them). A match survives unless a match from a later group overlaps it.
+    Matches come out in the order ``remove_lower_overlapping`` keeps them
+    in: a match that replaces others takes the place of the first one it
+    replaced.
+
+    The surviving matches never overlap each other, so kept sorted by start
+    their ends are sorted too, and the ones a match of the next group
+    overlaps are a contiguous run found with two bisections. Each group is
+    checked against the survivors of the ones before it, which are then
+    merged with it into the survivors for the next group.
+
+    >>> remove_overlapping([[('z', 0, 4), ('y', 6, 8)], [('a', 3, 7)]])
+    [('a', 3, 7)]
+    >>> remove_overlapping([[('z', 5, 6)], [('a', 0, 5)]])
+    [('z', 5, 6), ('a', 0, 5)]
+    """
+    # survivors so far, sorted by start: their starts, ends and (order key, match)
+    starts, ends, kept = [], [], []
+    counter = 0
+    for group in groups:
+        removed = [False] * len(kept)
+        added = []
+        for match in group:
+            _, start, end = match
+            low = bisect.bisect_right(ends, start)
+            high = bisect.bisect_left(starts, end, low)
+            key = None
+            for i in range(low, high):
+                if not removed[i]:
+                    removed[i] = True
+                    key = kept[i][0] if key is None else min(key, kept[i][0])
+            if key is None:
+                key = counter
+                counter += 1
+            added.append((start, end, (key, match)))
+        added.sort(key=lambda item: item[0])
+        survivors = [(starts[i], ends[i], kept[i]) for i in range(len(kept)) if not removed[i]]
+        merged = list(heapq.merge(survivors, added, key=lambda item: item[0]))
+        starts = [item[0] for item in merged]
+        ends = [item[1] for item in merged]
+        kept = [item[2] for item in merged]
+    return [match for _, match in sorted(kept, key=lambda item: item[0])]
@@ -22,6 +22,7 @@ setup(name='reparse',
       download_url='https://github.com/andychase/reparse/archive/master.zip',
       license='MIT',
       packages=find_packages(exclude=["tests", ".tox"]),
+      python_requires='>=3.7',
       install_requires=[
           'regex',
           'pyyaml',
@@ -32,8 +33,13 @@ setup(name='reparse',
           'Natural Language :: English',
           'License :: OSI Approved :: MIT License',
           'Programming Language :: Python',
-          'Programming Language :: Python :: 2.7',
-          'Programming Language :: Python :: 3.3',
+          'Programming Language :: Python :: 3',
+          'Programming Language :: Python :: 3 :: Only',
+          'Programming Language :: Python :: 3.7',
+          'Programming Language :: Python :: 3.8',
+          'Programming Language :: Python :: 3.9',
+          'Programming Language :: Python :: 3.10',
+          'Programming Language :: Python :: 3.11',
           'Topic :: Software Development :: Libraries :: Python Modules',
           'Topic :: Text Processing'
       ),
@@ -0,0 +1,46 @@
+""" The example parsers of ``examples/``, as the tests build them. """
+import importlib
+import os
+
+import yaml
+
+import reparse
+from reparse.builders import build_all
+
+examples = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples')
+
+
+def example_paths(name):
+    """ Paths of the expressions and patterns YAML of example ``name``. """
+    return os.path.join(examples, name, 'expressions.yaml'), os.path.join(examples, name, 'patterns.yaml')
+
+
+def example_functions_module(name):
+    return 'examples.{}.functions'.format(name)
+
+
+def example_functions(name):
+    return importlib.import_module(example_functions_module(name)).functions
+
+
+def example_yaml(name):
+    """ The loaded expressions and patterns of example ``name``. """
+    loaded = []
+    for path in example_paths(name):
+        with open(path) as f:
+            loaded.append(yaml.safe_load(f))
+    return tuple(loaded)
+
+
+def example_parser(name, **kwargs):
+    """ ``reparse.parser`` of example ``name``. """
+    expressions, patterns = example_paths(name)
+    return reparse.parser(
+        expressions_yaml_path=expressions, patterns_yaml_path=patterns, functions=example_functions(name), **kwargs
+    )
+
+
+def example_patterns(name):
+    """ The built patterns of example ``name``. """
+    expressions, patterns = example_yaml(name)
+    return build_all(patterns, expressions, example_functions(name))
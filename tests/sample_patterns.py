@@ -0,0 +1,36 @@
+""" Small patterns, with the lines to parse, that the parser tests share. """
+
+expressions = {
+    'Number': {
+        'Digits': {'Expression': r'(\d+)', 'Groups': ['Number']},
+    },
+    'Word': {
+        'Lower': {'Expression': r'([a-z]+)', 'Groups': ['Word']},
+        'Upper': {'Expression': r'([A-Z]+)', 'Groups': ['Word']},
+    },
+}
+
+patterns = {
+    'Numbers': {'Pattern': '<Number>', 'Order': 1},
+    'Words': {'Pattern': '<Word>', 'Order': 1},
+    'Pair': {'Pattern': '<Word>:<Number>', 'Order': 3},
+    'Spaced Pair': {'Pattern': '<Word>[ ]:<Number>', 'Order': 2},
+    'Hidden': {'Pattern': '<Word>', 'Order': 0},
+}
+
+functions = {
+    # Zero is falsy, so a pair of ``x:0`` lets lower orders win
+    'Pair': lambda word, number: int(number[0]),
+}
+
+lines = [
+    '',
+    'nothing here !',
+    'a:1',
+    'a:0',
+    '12 ab',
+    'x :4 y:5',
+    'x :0 y:0',
+    'long line with a:1 in the middle and b :2 at the end',
+    'AB:3 cd',
+]
@@ -0,0 +1,73 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from unittest import TestCase
+
+import reparse
+from reparse.aio import parse_stream
+
+
+def collect(results):
+    async def _collect():
+        return [result async for result in results]
+    return asyncio.run(_collect())
+
+
+async def numbers(count, produced=None):
+    for i in range(count):
+        if produced is not None:
+            produced.append(i)
+        yield '{} \n'.format(i)
+
+
+class TestParseStream(TestCase):
+
+    def setUp(self):
+        self.parser = reparse.Parser(reparse.SimpleExpression('n', r'(\d+)', int))
+
+    def test_async_iterable(self):
+        results = collect(parse_stream(self.parser.line, numbers(10), batch_size=3))
+        self.assertEqual(results, [{'n': i} for i in range(10)])
+
+    def test_stream_reader(self):
+        async def parse_reader():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'a 1\nb\nc 22')
+            reader.feed_eof()
+            return [result async for result in parse_stream(self.parser.line, reader)]
+        self.assertEqual(asyncio.run(parse_reader()), [{'n': 1}, {}, {'n': 22}])
+
+    def test_bytes_patterns(self):
+        parser = reparse.Parser(reparse.SimpleExpression('n', br'(\d+)', int))
+
+        async def parse_reader():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'a 1\nb\n')
+            reader.feed_eof()
+            return [result async for result in parse_stream(parser.line, reader, encoding=None)]
+        self.assertEqual(asyncio.run(parse_reader()), [{'n': 1}, {}])
+
+    def test_in_flight_batches_are_bounded(self):
+        produced = []
+
+        async def first_result():
+            results = parse_stream(self.parser.line, numbers(1000, produced), batch_size=10, max_in_flight=2)
+            result = await results.__anext__()
+            await results.aclose()
+            return result
+        self.assertEqual(asyncio.run(first_result()), {'n': 0})
+        self.assertLessEqual(len(produced), 10 * 3 + 1)
+
+    def test_process_pool(self):
+        parse = reparse.parser(
+            patterns={'Id': {'Pattern': 'id=<Digits>', 'Order': 1}},
+            expressions={'Digits': {'Digits': {'Expression': r'(\d+)', 'Groups': ['Value']}}},
+            functions={'Value': int},
+        )
+
+        async def lines():
+            for i in range(1, 21):
+                yield 'id={}\n'.format(i)
+        with ProcessPoolExecutor(2, multiprocessing.get_context('spawn')) as executor:
+            results = collect(parse_stream(parse, lines(), executor, batch_size=6))
+        self.assertEqual(results, [[[i]] for i in range(1, 21)])
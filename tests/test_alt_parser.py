@@ -0,0 +1,19 @@
+from unittest import TestCase
+
+from reparse import alt_parser
+from reparse.builders import build_all
+from tests.sample_patterns import expressions, functions, patterns
+
+
+class TestAltParser(TestCase):
+
+    def setUp(self):
+        self.patterns = build_all(patterns, expressions, functions)
+
+    def test_higher_order_matches_replace_overlapped_ones(self):
+        parse = alt_parser(self.patterns)
+        self.assertEqual(parse('x :4 y:5'), [[['x'], ['4']], [5]])
+        self.assertEqual(parse('AB:3 cd'), [[3], [['cd']]])
+
+    def test_no_matches(self):
+        self.assertEqual(alt_parser(self.patterns)(''), [])
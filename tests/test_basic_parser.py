@@ -0,0 +1,24 @@
+from unittest import TestCase
+
+from reparse import basic_parser
+from reparse.builders import build_all
+from tests.sample_patterns import expressions, functions, lines, patterns
+
+
+class TestEarlyExitParser(TestCase):
+
+    def setUp(self):
+        self.patterns = build_all(patterns, expressions, functions)
+
+    def test_same_output_as_basic_parser(self):
+        basic = basic_parser(self.patterns, with_name=True)
+        early_exit = basic_parser(self.patterns, with_name=True, early_exit=True)
+        for line in lines:
+            self.assertEqual(early_exit(line), basic(line), line)
+
+    def test_stops_at_first_pattern_with_results(self):
+        calls = []
+        functions = {'Pair': lambda word, number: int(number[0]), 'Words': lambda *_: calls.append(_)}
+        parse = basic_parser(build_all(patterns, expressions, functions), early_exit=True)
+        self.assertEqual(parse('a:1'), [1])
+        self.assertEqual(calls, [])
@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from reparse.benchmark import __main__ as benchmark_main
+from reparse.benchmark import runner
+from reparse.benchmark.corpus import example_string, generate, pattern_samples
+from tests.example_parsers import example_yaml
+
+
+class TestCorpus(TestCase):
+
+    def test_pattern_samples_match_their_pattern(self):
+        expressions, patterns = example_yaml('colortime')
+        samples = pattern_samples(patterns, expressions)
+        self.assertEqual(sorted(samples), ['BasicColorTime', 'OnlyColor'])
+        self.assertTrue(all(samples.values()))
+        self.assertIn('Crazy 2pm Green', samples['OnlyColor'])
+
+    def test_density(self):
+        expressions, patterns = example_yaml('phone')
+        dense = generate(expressions, patterns, lines=400, density=0.9)
+        sparse = generate(expressions, patterns, lines=400, density=0.1)
+        count = lambda corpus: sum('+' in line and '-' in line for line in corpus)
+        self.assertGreater(count(dense), 300)
+        self.assertLess(count(sparse), 100)
+
+    def test_unsupported_regex(self):
+        self.assertIsNone(example_string(r'(a)\1'))
+        self.assertEqual(example_string(r'^(?:ab|c)+$'), 'ab')
+
+
+class TestRunner(TestCase):
+
+    def test_report_and_regressions(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            path = f.name
+        try:
+            self.assertEqual(benchmark_main.main(['--lines', '50', '--output', path]), 0)
+            with open(path) as f:
+                report = json.load(f)
+            self.assertEqual(sorted(report['results']), ['colortime', 'phone'])
+            self.assertEqual(sorted(report['results']['phone']), ['Parser', 'alt_parser', 'basic_parser'])
+            metrics = report['results']['phone']['basic_parser']
+            self.assertGreater(metrics['lines_per_second'], 0)
+            self.assertGreater(metrics['peak_memory'], 0)
+            self.assertEqual(sorted(metrics['latency']), ['p50', 'p90', 'p99'])
+
+            slower = json.loads(json.dumps(report))
+            slower['results']['phone']['basic_parser']['lines_per_second'] /= 2
+            self.assertEqual(len(runner.compare(report, slower)), 1)
+            self.assertEqual(runner.compare(report, report), [])
+        finally:
+            os.unlink(path)
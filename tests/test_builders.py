@@ -0,0 +1,95 @@
+import random
+from unittest import TestCase
+
+from reparse import config
+from reparse.builders import CyclicPatternError, ExpressionGroupNotFound, build_all, build_order
+
+expressions = {'Number': {'Number': {'Expression': r'(\d+)', 'Groups': ['Number']}}}
+
+
+def passes_order(names, dependencies):
+    # how patterns used to be built: retry the failures until none are left
+    built, remaining = [], list(names)
+    while remaining:
+        failed = []
+        for name in remaining:
+            if all(d in built for d in dependencies[name]):
+                built.append(name)
+            else:
+                failed.append(name)
+        remaining = failed
+    return built
+
+
+class TestBuildOrder(TestCase):
+
+    def test_same_order_as_repeated_passes(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            names = ['p{}'.format(i) for i in range(rng.randint(1, 12))]
+            # only depend on "older" patterns so there are no cycles, then shuffle
+            dependencies = dict((name, rng.sample(names[:i], rng.randint(0, min(i, 3))))
+                                for i, name in enumerate(names))
+            rng.shuffle(names)
+            self.assertEqual(build_order(names, dependencies), passes_order(names, dependencies))
+
+    def test_deep_chains_build(self):
+        depth = 50
+        patterns = dict(('P{}'.format(i), {'Pattern': '<P{}>'.format(i + 1), 'Order': 1}) for i in range(depth))
+        patterns['P{}'.format(depth)] = {'Pattern': '<Number>', 'Order': 1}
+        built = build_all(patterns, expressions, {})
+        self.assertEqual([p.name for p in built][:2], ['P{}'.format(depth), 'P{}'.format(depth - 1)])
+        self.assertEqual(built[-1].name, 'P0')
+        self.assertIn("'12'", repr(built[-1].findall('12')))
+
+    def test_cycles(self):
+        patterns = {
+            'A': {'Pattern': '<Number> <B>'},
+            'B': {'Pattern': '<C>'},
+            'C': {'Pattern': '<A>'},
+        }
+        with self.assertRaises(CyclicPatternError) as raised:
+            build_all(patterns, expressions, {})
+        self.assertIn('A -> B -> C -> A', str(raised.exception))
+
+    def test_recursion_depth_setting_is_deprecated(self):
+        with self.assertWarns(DeprecationWarning):
+            config.pattern_max_recursion_depth
+
+    def test_missing_reference(self):
+        with self.assertRaises(ExpressionGroupNotFound) as raised:
+            build_all({'A': {'Pattern': '<Numbr>'}}, expressions, {})
+        self.assertIn('Numbr', str(raised.exception))
+        self.assertIn('[A]', str(raised.exception))
+
+
+class TestSharedSubExpressions(TestCase):
+
+    patterns = {
+        'Block': {'Pattern': '<Number> - <Number>'},
+        'Range': {'Pattern': 'from \\s <Block>', 'Order': 1},
+        'Other': {'Pattern': 'to \\s <Number>', 'Order': 1},
+    }
+
+    def test_regex_text_is_only_built_when_used(self):
+        built = dict((p.name, p) for p in build_all(self.patterns, expressions, {}))
+        self.assertIsNone(built['Range']._regex)
+        self.assertEqual(built['Range'].regex, r'from \s (?:(?:(?:(\d+))) - (?:(?:(\d+))))')
+        # children used on the way keep no text of their own
+        self.assertIsNone(built['Block']._regex)
+
+    def test_basic_parser_leaves_building_blocks_alone(self):
+        import reparse
+        built = dict((p.name, p) for p in build_all(self.patterns, expressions, {}))
+        parse = reparse.basic_parser(list(built.values()))
+        self.assertEqual(parse('from 1-2'), [[['1'], ['2']]])
+        self.assertIsNone(built['Block']._compiled)
+
+    def test_identical_expressions_are_shared(self):
+        both = dict(expressions, Count=expressions['Number'])
+        built = dict((p.name, p) for p in build_all(
+            {'A': {'Pattern': '<Number>'}, 'B': {'Pattern': '<Count>'}}, both, {}
+        ))
+        number_type, count_type = built['A']._parts[1][0], built['B']._parts[1][0]
+        self.assertIsNot(number_type, count_type)
+        self.assertIs(number_type._parts[1][0], count_type._parts[1][0])
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase, mock
+
+import reparse
+from tests.example_parsers import example_functions, example_parser
+
+
+class TestCache(TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_warm_start_skips_building(self):
+        cold = example_parser('phone', parser_type=reparse.build_tree_parser, cache_dir=self.cache_dir)
+        with mock.patch('reparse.builders.build_all') as build_all, mock.patch('yaml.safe_load') as safe_load:
+            warm = example_parser(
+                'phone', parser_type=reparse.build_tree_parser, cache_dir=self.cache_dir
+            )
+        self.assertFalse(build_all.called)
+        self.assertFalse(safe_load.called)
+        self.assertEqual(warm, cold)
+
+    def test_cached_parser_gives_the_same_results(self):
+        uncached = example_parser('colortime', parser_type=reparse.alt_parser)
+        example_parser('colortime', cache_dir=self.cache_dir)
+        cached = example_parser('colortime', parser_type=reparse.alt_parser,
+                                cache_dir=self.cache_dir)
+        for line in ['Orange at 8pm', 'Crazy 2pm Green', 'Green 11 am, Orange 3pm', 'nothing']:
+            self.assertEqual(cached(line), uncached(line))
+
+    def test_unreadable_cache_is_rebuilt(self):
+        example_parser('phone', cache_dir=self.cache_dir)
+        for name in os.listdir(self.cache_dir):
+            with open(os.path.join(self.cache_dir, name), 'w') as f:
+                f.write('{not json')
+        parse = example_parser('phone', parser_type=reparse.pattern_list, cache_dir=self.cache_dir)
+        self.assertEqual(sorted(p.name for p in parse), ['Basic Phone', 'Fax Phone'])
+
+    def test_nested_groups_stay_lazy(self):
+        from reparse.cache import dump_patterns, load_patterns
+        patterns = example_parser('colortime', parser_type=reparse.pattern_list)
+        data = dump_patterns(patterns)
+        groups = [pattern._parts[1] for pattern in patterns if pattern._parts is not None]
+        self.assertTrue(groups)
+        for children in groups:
+            for child in children:
+                if child._parts is not None:
+                    self.assertIsNone(child._regex)
+        self.assertNotIn('literals', data[0])
+        loaded = load_patterns(data, example_functions('colortime'))
+        self.assertEqual([p.regex for p in loaded], [p.regex for p in patterns])
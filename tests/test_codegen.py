@@ -0,0 +1,60 @@
+import gc
+import linecache
+from unittest import TestCase
+
+import reparse
+from reparse.codegen import compile_pattern, compile_patterns
+from reparse.expression import Expression
+from tests.example_parsers import example_parser, example_patterns
+
+
+class TestCodegen(TestCase):
+
+    def assertGeneratedMatchesPlan(self, name, lines):
+        patterns = example_patterns(name)
+        plans = [pattern.plan for pattern in patterns]
+        compile_patterns(patterns)
+        for pattern, plan in zip(patterns, plans):
+            self.assertIn('def ', pattern.plan.source)
+            for line in lines:
+                for match in pattern.pattern.finditer(line):
+                    groups = tuple('' if g is None else g for g in match.groups())
+                    self.assertEqual(pattern.run(groups), plan(groups))
+
+    def test_phone(self):
+        self.assertGeneratedMatchesPlan('phone', [
+            '+974-584-5656', 'Fax: +000-000-0000', 'call +323-343-3453 now', '974-584-5656',
+        ])
+
+    def test_colortime(self):
+        self.assertGeneratedMatchesPlan('colortime', [
+            'Orange at 8pm', 'Crazy 2pm Green', 'Green 11 am, Orange 3pm', 'nothing',
+        ])
+
+    def test_compiled_parser(self):
+        compiled = example_parser('colortime', parser_type=reparse.alt_parser, compiled=True)
+        interpreted = example_parser('colortime', parser_type=reparse.alt_parser)
+        for line in ['Orange at 8pm', 'Crazy 2pm Green', 'Green 11 am, Orange 3pm', 'nothing']:
+            self.assertEqual(compiled(line), interpreted(line))
+
+    def test_any_pattern_name_compiles(self):
+        for name in ['2 odd-name!', 'None', 'class', 'f0', 'f1']:
+            run = compile_pattern(Expression('(a)(b)', [list, list], [1, 1], tuple, name))
+            self.assertEqual(run.__name__, 'run')
+            self.assertIn(name, run.__code__.co_filename)
+            self.assertEqual(run(('a', 'b')), (['a'], ['b']))
+
+    def test_patterns_of_the_same_name_keep_their_source(self):
+        first = compile_pattern(Expression('(a)', [list], [1], tuple, 'same'))
+        second = compile_pattern(Expression('(a)(b)', [list, list], [1, 1], tuple, 'same'))
+        for run in (first, second):
+            filename = run.__code__.co_filename
+            self.assertEqual(''.join(linecache.getlines(filename)), run.source)
+
+    def test_source_is_forgotten_with_its_function(self):
+        run = compile_pattern(Expression('(a)', [list], [1], tuple, 'short lived'))
+        filename = run.__code__.co_filename
+        self.assertIn(filename, linecache.cache)
+        del run
+        gc.collect()
+        self.assertNotIn(filename, linecache.cache)
@@ -0,0 +1,41 @@
+import time
+from unittest import TestCase
+
+from reparse import basic_parser, combined_parser
+from reparse.builders import build_all
+from tests.sample_patterns import expressions, functions, lines, patterns
+
+
+class TestCombinedParser(TestCase):
+
+    def setUp(self):
+        self.patterns = build_all(patterns, expressions, functions)
+
+    def test_same_output_as_basic_parser(self):
+        basic = basic_parser(self.patterns, with_name=True)
+        combined = combined_parser(self.patterns, with_name=True)
+        for line in lines:
+            self.assertEqual(combined(line), basic(line), line)
+
+    def test_lower_order_match_does_not_hide_higher_order(self):
+        """A long low order match must not swallow a later high order one."""
+        parse = combined_parser(self.patterns, with_name=True)
+        self.assertEqual(parse('word b:2'), ([2], 'Pair'))
+
+    def test_long_matches_are_scanned_once(self):
+        parse = combined_parser(self.patterns, with_name=True)
+        line = '7' * 100000
+        started = time.perf_counter()
+        self.assertEqual(parse(line), basic_parser(self.patterns, with_name=True)(line))
+        self.assertLess(time.perf_counter() - started, 1)
+
+    def test_patterns_without_order_never_match(self):
+        built = build_all({'Numbers': {'Pattern': '<Number>'}}, expressions, functions)
+        self.assertIsNone(combined_parser(built)('12'))
+        self.assertEqual(combined_parser(built, with_name=True)('12'), (None, None))
+        self.assertEqual(combined_parser(built, with_name=True)('12'), basic_parser(built, with_name=True)('12'))
+
+    def test_falls_back_for_uncombinable_patterns(self):
+        expressions = {'Twice': {'Twice': {'Expression': r'(a)\1', 'Groups': ['A']}}}
+        built = build_all({'Twice': {'Pattern': '<Twice>', 'Order': 1}}, expressions, {})
+        self.assertEqual(combined_parser(built)('aa'), basic_parser(built)('aa'))
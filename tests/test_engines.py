@@ -0,0 +1,39 @@
+import re
+from unittest import TestCase
+
+from reparse import Parser, SimpleExpression
+from reparse.engines import engine_names, get_engine
+from reparse.tools.engine_benchmark import corpus
+
+
+class TestEngines(TestCase):
+
+    def test_builtin_engines_share_flags(self):
+        self.assertEqual(engine_names(), ['re', 'regex', 'regex-concurrent'])
+        self.assertEqual(get_engine('re').flags, get_engine('regex').flags)
+        self.assertTrue(get_engine('re').flags & re.VERBOSE)
+
+    def test_default_engine(self):
+        self.assertEqual(get_engine().name, 'regex')
+        self.assertIs(get_engine(get_engine('re')), get_engine('re'))
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            get_engine('pcre')
+
+    def test_parsers_match_the_same_way_on_every_engine(self):
+        results = [
+            Parser(
+                SimpleExpression('time', r'(\d+) \s* (pm|am)', lambda n, m: (int(n), m.lower()), flags=None),
+                engine=engine,
+            ).line('Meet at 8 PM')
+            for engine in engine_names()
+        ]
+        self.assertEqual(results, [{'time': (8, 'pm')}] * len(results))
+
+    def test_benchmark_corpus(self):
+        expressions = {'Number': {'Digits': {'Expression': r'\d+', 'Matches': '1 | 22', 'Non-Matches': 'x'}}}
+        self.assertEqual(corpus(expressions, 4), [
+            'lorem ipsum 1 dolor sit amet', 'lorem ipsum 22 dolor sit amet',
+            'lorem ipsum x dolor sit amet', 'lorem ipsum 1 dolor sit amet',
+        ])
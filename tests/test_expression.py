@@ -1,6 +1,7 @@
 from unittest import TestCase
+from reparse.compiled import pattern_cache
 from reparse.expression import (
-    AlternatesGroup, Expression, InvalidPattern
+    AlternatesGroup, Expression, InvalidPattern, SimpleExpression
 )
 
 
@@ -48,3 +49,10 @@ class TestExpression(TestCase):
 
         grouped_expressions = AlternatesGroup([exp, exp2], final)
         self.assertEquals(grouped_expressions.findall("hi"), ["hi"])
+
+    def test_identical_regexes_are_compiled_once(self):
+        first = SimpleExpression('a', r'shared (\d+) regex', int, flags=None)
+        second = Expression(r'shared (\d+) regex', [int], [1], lambda x: x)
+        hits = pattern_cache.info()['hits']
+        self.assertIs(first.pattern, second.pattern)
+        self.assertEqual(pattern_cache.info()['hits'], hits + 1)
@@ -0,0 +1,47 @@
+import io
+import json
+from unittest import TestCase
+
+import reparse
+from reparse.instrument import Recorder, instrumented
+from tests.example_parsers import example_parser
+
+
+class TestInstrument(TestCase):
+
+    def setUp(self):
+        self.recorder = Recorder()
+
+    def test_basic_parser_discards_by_order(self):
+        parse = example_parser('phone', parser_type=instrumented(reparse.basic_parser, self.recorder))
+        plain = example_parser('phone', parser_type=reparse.basic_parser)
+        lines = ['Fax: +000-000-0000', '+974-584-5656', 'nothing']
+        self.assertEqual([parse(line) for line in lines], [plain(line) for line in lines])
+        patterns = self.recorder.snapshot()['patterns']
+        self.assertEqual(patterns['Fax Phone']['matches'], 1)
+        self.assertEqual(patterns['Fax Phone']['discarded'], 0)
+        self.assertEqual(patterns['Basic Phone']['matches'], 2)
+        self.assertEqual(patterns['Basic Phone']['discarded'], 1)
+        self.assertGreater(patterns['Basic Phone']['regex_time'], 0)
+        self.assertGreater(patterns['Basic Phone']['function_time'], 0)
+
+    def test_alt_parser_discards_overlaps(self):
+        parse = example_parser('colortime', parser_type=instrumented(reparse.alt_parser, self.recorder))
+        plain = example_parser('colortime', parser_type=reparse.alt_parser)
+        lines = ['Orange at 8pm', 'Crazy 2pm Green at 8pm', 'Green 11 am, Orange 3pm']
+        self.assertEqual([parse(line) for line in lines], [plain(line) for line in lines])
+        snapshot = self.recorder.snapshot()
+        self.assertEqual(snapshot['patterns']['BasicColorTime']['discarded'], 1)
+        self.assertEqual(snapshot['patterns']['OnlyColor']['discarded'], 0)
+        self.assertIn('Color', snapshot['types'])
+        self.assertGreater(snapshot['types']['Color']['matches'], 0)
+        self.assertLessEqual(snapshot['types']['Color']['matches'], snapshot['types']['Color']['evaluations'])
+
+    def test_dump(self):
+        parse = example_parser('phone', parser_type=instrumented(reparse.basic_parser, self.recorder))
+        parse('+974-584-5656')
+        f = io.StringIO()
+        self.recorder.dump(f)
+        self.assertEqual(json.loads(f.getvalue())['patterns']['Basic Phone']['evaluations'], 1)
+        self.recorder.reset()
+        self.assertEqual(self.recorder.snapshot(), {'patterns': {}, 'types': {}})
@@ -0,0 +1,13 @@
+from unittest import TestCase
+
+from reparse import basic_parser, iter_lines
+from reparse.builders import build_all
+from tests.sample_patterns import expressions, functions, patterns
+
+
+class TestIterators(TestCase):
+
+    def test_iter_lines_with_a_function_parser(self):
+        parse = basic_parser(build_all(patterns, expressions, functions))
+        results = list(iter_lines(parse, ['a:1\n', '!\n', 'b:2\n']))
+        self.assertEqual(results, [(1, 0, [1]), (2, 4, None), (3, 6, [2])])
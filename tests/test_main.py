@@ -0,0 +1,63 @@
+import gzip
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+
+from reparse.__main__ import main
+from tests.example_parsers import example_functions_module, example_paths, examples
+
+colortime = list(example_paths('colortime')) + [example_functions_module('colortime')]
+lines = ['Orange at 8pm', 'nothing', 'Crazy 2pm Green', 'Green 11 am, Orange 3pm'] * 25
+
+
+class TestMain(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.plain = os.path.join(self.directory, 'plain.log')
+        self.gzipped = os.path.join(self.directory, 'gzipped.log.gz')
+        with open(self.plain, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        with gzip.open(self.gzipped, 'wt') as f:
+            f.write('\n'.join(lines))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_main(self, *arguments):
+        out = io.StringIO()
+        self.assertEqual(main(colortime + list(arguments), out), 0)
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_a_record_per_line(self):
+        records = self.run_main(self.plain)
+        self.assertEqual(len(records), len(lines))
+        self.assertEqual(records[0], {'file': self.plain, 'line': 1, 'result': [['Orange', '20:00:00']]})
+        self.assertEqual(records[1], {'file': self.plain, 'line': 2, 'result': None})
+
+    def test_gzip_input(self):
+        records = self.run_main(self.gzipped)
+        self.assertEqual([r['result'] for r in records], [r['result'] for r in self.run_main(self.plain)])
+
+    def test_workers_keep_the_order(self):
+        expected = self.run_main(self.plain, self.gzipped, '--matches-only', '--parser-type', 'alt_parser')
+        records = self.run_main(self.plain, self.gzipped, '--matches-only', '--parser-type', 'alt_parser',
+                                '--workers', '2', '--batch-size', '7')
+        self.assertEqual(records, expected)
+        self.assertEqual(len(records), 100)
+        self.assertEqual([r['line'] for r in records[:3]], [1, 3, 5])
+
+    def test_stdin(self):
+        with open(self.gzipped, 'rb') as f:
+            output = subprocess.check_output(
+                [sys.executable, '-m', 'reparse'] + colortime + ['--matches-only'], stdin=f,
+                cwd=os.path.dirname(examples), env=dict(os.environ, PYTHONPATH=os.path.dirname(examples)),
+            )
+        records = [json.loads(line) for line in output.decode('utf-8').splitlines()]
+        self.assertEqual(records[0], {'file': '-', 'line': 1, 'result': [['Orange', '20:00:00']]})
+        self.assertEqual(len(records), 50)
@@ -0,0 +1,63 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from reparse import Parser, SimpleExpression, basic_parser, iter_file
+from reparse.builders import build_all
+
+
+class TestMappedInput(TestCase):
+
+    def setUp(self):
+        with tempfile.NamedTemporaryFile('wb', delete=False) as f:
+            f.write(b'id=1 took 5ms\nnothing\nid=22 took 17ms\n\nid=3')
+        self.path = f.name
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_parse_file_accepts_a_path_or_file_descriptor(self):
+        parser = Parser(SimpleExpression('id', r'id=(\d+)', int), SimpleExpression('ms', r'(\d+)ms', int))
+        with open(self.path) as f:
+            expected = parser.parse_file(f)
+        self.assertEqual(parser.parse_file(self.path), expected)
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            self.assertEqual(parser.parse_file(fd), expected)
+        finally:
+            os.close(fd)
+
+    def test_function_parser_over_a_path_gives_byte_offsets(self):
+        parse = basic_parser(build_all(
+            {'Id': {'Pattern': 'id=<Number>', 'Order': 1}},
+            {'Number': {'Number': {'Expression': r'(\d+)', 'Groups': ['Number']}}},
+            {'Id': lambda n: int(n[0])},
+        ))
+        results = [(n, offset, result) for n, offset, result in iter_file(parse, self.path) if result]
+        self.assertEqual(results, [(1, 0, [1]), (3, 22, [22]), (5, 39, [3])])
+
+    def test_bytes_patterns_skip_decoding(self):
+        parser = Parser(SimpleExpression('id', br'id=(\d+)', int))
+        results = [result for _, _, result in parser.iter_file(self.path, encoding=None)]
+        self.assertEqual(results, [{'id': 1}, {}, {'id': 22}, {}, {'id': 3}])
+
+    def test_every_way_to_parse_a_file_splits_lines_alike(self):
+        with tempfile.NamedTemporaryFile('wb', delete=False) as f:
+            f.write(b'alpha one\r\nbeta two\rgamma three\n')
+        try:
+            parser = Parser(SimpleExpression('last', r'(\w+)$', str))
+            expected = {'last': ['one', 'two', 'three']}
+            self.assertEqual(parser.parse_file(f.name), expected)
+            with open(f.name) as text:
+                self.assertEqual(parser.parse_file(text), expected)
+            self.assertEqual(parser.parse_file(f.name, workers=2, chunk_size=4), expected)
+        finally:
+            os.unlink(f.name)
+
+    def test_empty_file(self):
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            pass
+        try:
+            self.assertEqual(Parser(SimpleExpression('n', r'(\d)', int)).parse_file(f.name), {})
+        finally:
+            os.unlink(f.name)
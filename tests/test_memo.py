@@ -0,0 +1,54 @@
+import itertools
+from unittest import TestCase
+
+import reparse
+from reparse import Parser, SimpleExpression
+from reparse.builders import build_all
+from reparse.memo import LineCache, impure, memoized
+from tests.example_parsers import example_parser
+
+
+class TestLineCache(TestCase):
+
+    def test_repeated_lines_hit(self):
+        parse = example_parser('colortime', parser_type=reparse.alt_parser, line_cache_size=10)
+        lines = ['Orange at 8pm', 'heartbeat', 'Orange at 8pm', 'heartbeat', 'Green 11 am']
+        results = [parse(line) for line in lines]
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(parse.info()['hits'], 2)
+        self.assertEqual(parse.info()['hit_rate'], 0.4)
+
+    def test_least_recently_used_line_is_evicted(self):
+        calls = []
+        parse = LineCache(lambda line: calls.append(line), maxsize=2)
+        for line in ['a', 'b', 'a', 'c', 'a', 'b']:
+            parse(line)
+        self.assertEqual(calls, ['a', 'b', 'c', 'b'])
+        self.assertEqual(parse.info()['evictions'], 2)
+
+    def test_impure_functions_are_not_cached(self):
+        counter = itertools.count()
+        parse = memoized(reparse.basic_parser)(build_all(
+            {'Seen': {'Pattern': '<Word>', 'Order': 1}},
+            {'Word': {'Word': {'Expression': r'(\w+)', 'Groups': ['Word']}}},
+            {'Seen': impure(lambda word: (word, next(counter)))},
+        ))
+        self.assertEqual(parse('ping'), [(['ping'], 0)])
+        self.assertEqual(parse('ping'), [(['ping'], 1)])
+        self.assertEqual(parse.info()['impure'], 2)
+        self.assertEqual(parse.info()['size'], 0)
+
+    def test_parser_results_can_be_changed_safely(self):
+        uncached = Parser(SimpleExpression('n', r'(\d+)', lambda n: [int(n)]))
+        parser = Parser(SimpleExpression('n', r'(\d+)', lambda n: [int(n)]), line_cache_size=4)
+        lines = ['1', '1', '2', '1']
+        self.assertEqual(parser.parse_file(lines), uncached.parse_file(lines))
+        parser.line('1')['n'].append(5)
+        self.assertEqual(parser.line('1'), {'n': [1]})
+        self.assertEqual(parser.line.info()['misses'], 2)
+
+    def test_results_can_be_shared(self):
+        parser = Parser(SimpleExpression('n', r'(\d+)', lambda n: [int(n)]), line_cache_size=4, line_cache_copy=False)
+        self.assertIs(parser.line('1'), parser.line('1'))
+        parse = example_parser('colortime', parser_type=reparse.alt_parser, line_cache_size=4, line_cache_copy=False)
+        self.assertIs(parse('Orange at 8pm'), parse('Orange at 8pm'))
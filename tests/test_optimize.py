@@ -0,0 +1,90 @@
+import random
+import re
+from unittest import TestCase
+
+import regex
+
+import reparse
+from reparse.builders import build_all
+from reparse.optimize import literal_alternatives, optimize_alternation
+
+
+class TestTrieAlternation(TestCase):
+
+    def test_matches_like_the_plain_alternation(self):
+        rng = random.Random(3)
+        alphabet = 'abAB é'
+        for _ in range(300):
+            words = [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 4))).strip()
+                     for _ in range(rng.randint(1, 12))]
+            source = '(' + '|'.join(re.escape(word) for word in words) + ')'
+            for flags in (re.VERBOSE, re.VERBOSE | re.IGNORECASE):
+                optimized = optimize_alternation(source, flags, threshold=1)
+                for tail in ('', 'b', r'\b'):
+                    plain, trie = regex.compile(source + tail, flags), regex.compile(optimized + tail, flags)
+                    for _ in range(5):
+                        text = ''.join(rng.choice(alphabet + 'x') for _ in range(rng.randint(0, 10)))
+                        self.assertEqual(trie.findall(text), plain.findall(text), (source, optimized, text))
+
+    def test_only_plain_alternations(self):
+        self.assertIsNone(literal_alternatives(r'(a|b)(c)'))
+        self.assertIsNone(literal_alternatives(r'(a|[bc])'))
+        self.assertIsNone(literal_alternatives(r'(?:a|b)'))
+        self.assertIsNone(literal_alternatives(r'(a|b) # comment | c', re.VERBOSE))
+        self.assertEqual(optimize_alternation('(ab|ac)', threshold=3), '(ab|ac)')
+
+    def test_builder_keeps_groups_and_functions(self):
+        cities = ['Berlin', 'Bern', 'Bergen', 'Munich', 'Hamburg', 'Hamm'] * 3
+        expressions = {'Place': {'Cities': {'Expression': '(' + ' | '.join(cities) + ')', 'Groups': ['City']}}}
+        patterns = {'Trip': {'Pattern': 'to \\s <Place>', 'Order': 1}}
+        functions = {'City': lambda city: city.upper()}
+        built = build_all(patterns, expressions, functions)
+        self.assertIn('Ber', built[0].regex)
+        self.assertNotIn('Berlin', built[0].regex)
+        parse = reparse.basic_parser(built)
+        self.assertEqual(parse('Going to bern, then to Hamm'), [['BERN'], ['HAMM']])
+
+
+def build(patterns, expressions, functions, optimized=True):
+    built = build_all(patterns, expressions, functions)
+    if not optimized:
+        for pattern in built:
+            pattern.before_compile = None
+    return built
+
+
+class TestDeadCaptures(TestCase):
+
+    def assertSameResults(self, patterns, expressions, functions, lines, dead):
+        optimized = build(patterns, expressions, functions)
+        plain = build(patterns, expressions, functions, optimized=False)
+        for line in lines:
+            self.assertEqual([p.findall(line) for p in optimized], [p.findall(line) for p in plain])
+            self.assertEqual([p.scan(line) for p in optimized], [p.scan(line) for p in plain])
+        self.assertEqual(
+            [p.pattern.groups for p in optimized], [p.pattern.groups - d for p, d in zip(plain, dead)]
+        )
+
+    def test_captures_beyond_the_declared_groups(self):
+        expressions = {'Size': {'Size': {'Expression': r'(\d+) \s? (k|m)?(b)', 'Groups': ['Amount']}}}
+        self.assertSameResults({'Size': {'Pattern': '<Size>', 'Order': 1}}, expressions, {},
+                               ['12 kb', '3b and 4 mb'], [2])
+
+    def test_captures_between_types(self):
+        expressions = {'Number': {'Number': {'Expression': r'(\d+)', 'Groups': ['Number']}}}
+        patterns = {'Pair': {'Pattern': '(x|y) = <Number>', 'Order': 1}}
+        self.assertSameResults(patterns, expressions, {}, ['x=1 y=22'], [1])
+
+    def test_overwritten_group_names(self):
+        expressions = {'Code': {'Digits': {'Expression': r'(\d)(\d)', 'Groups': ['Digit', 'Digit']}}}
+        functions = {'Digits': lambda Digit: int(Digit)}
+        self.assertSameResults({'Last': {'Pattern': '<Code>', 'Order': 1}}, expressions, functions,
+                               ['12 34'], [1])
+        self.assertEqual(build({'Last': {'Pattern': '<Code>', 'Order': 1}}, expressions, functions)[0]
+                         .findall('12 34'), [2, 4])
+
+    def test_used_captures_stay(self):
+        expressions = {'Number': {'Number': {'Expression': r'(\d+)', 'Groups': ['Number']}}}
+        pattern = build({'One': {'Pattern': '<Number>', 'Order': 1}}, expressions, {})[0]
+        pattern.pattern
+        self.assertIsNone(pattern.match_regex)
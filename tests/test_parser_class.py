@@ -1,4 +1,6 @@
 import io
+import os
+import tempfile
 
 from six import u
 from unittest import TestCase
@@ -52,3 +54,58 @@ class TestParserClass(TestCase):
         parser = Parser(SimpleExpression('numbers', r'\d+', int))
         result = parser('1 2 3')
         assert result['numbers'] == [1, 2, 3]
+
+    def test_parallel_file_parsing_matches_serial(self):
+        parser = Parser(
+            SimpleExpression('hour', r'([12]?\d)(am|pm)', time_12_to_24),
+            SimpleExpression('minutes', r'(\d+)min', int),
+        )
+        lines = ['{}am - {}min break, {}pm\n'.format(i % 12, i, (i + 3) % 12) for i in range(500)]
+        lines += ['no hours here\n', '11pm\n']
+        with tempfile.NamedTemporaryFile('w', suffix='.log', delete=False) as f:
+            f.writelines(lines)
+        try:
+            with open(f.name) as serial_file:
+                expected = parser.parse_file(serial_file)
+            self.assertEqual(parser.parse_file(f.name, workers=2, chunk_size=1000), expected)
+        finally:
+            os.unlink(f.name)
+
+    def test_expressions_compile_without_flags(self):
+        parser = Parser(SimpleExpression('tag', r'#(\d+)', int), SimpleExpression('words', r'foo bar (\d+)', int))
+        self.assertEqual(parser.line('issue #42 foo bar 1'), {'tag': 42, 'words': 1})
+        self.assertEqual(parser.line('foobar1 FOO BAR 2'), {})
+
+    def test_package_exports_only_the_parser_api(self):
+        import reparse
+        for name in ['basic_parser', 'combined_parser', 'alt_parser', 'parser', 'Parser', 'PicklableParser']:
+            self.assertTrue(hasattr(reparse, name), name)
+        for name in ['copy', 'itertools', 'get_engine', 'LiteralIndex', 'CombinedExpression', 'ranked_patterns']:
+            self.assertFalse(hasattr(reparse, name), name)
+
+    def test_unknown_keywords_are_refused(self):
+        self.assertRaises(TypeError, Parser, SimpleExpression('n', r'(\d+)', int), line_cahce_size=10)
+
+    def test_parallel_file_parsing_needs_a_path(self):
+        parser = Parser(SimpleExpression('minutes', r'(\d+)min', int))
+        self.assertRaises(ValueError, parser.parse_file, io.StringIO(u('5min\n')), workers=2)
+        with tempfile.NamedTemporaryFile('w', delete=False) as f:
+            f.write('5min\n')
+        fd = os.open(f.name, os.O_RDONLY)
+        try:
+            self.assertRaises(ValueError, parser.parse_file, fd, workers=2)
+            # the caller's descriptor is left open
+            self.assertEqual(os.fstat(fd).st_size, 5)
+            with open(f.name) as opened:
+                self.assertEqual(parser.parse_file(opened, workers=2), {'minutes': 5})
+        finally:
+            os.close(fd)
+            os.unlink(f.name)
+
+    def test_iter_file_yields_each_line_as_it_is_parsed(self):
+        parser = Parser(
+            SimpleExpression('hour', r'([12]?\d)(am|pm)', time_12_to_24)
+        )
+        results = parser.iter_file(io.StringIO(u('8am\nlunch\n1pm\n')))
+        assert next(results) == (1, 0, {'hour': 8})
+        assert list(results) == [(2, 4, {}), (3, 10, {'hour': 13})]
@@ -0,0 +1,74 @@
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from unittest import TestCase
+
+import reparse
+from reparse.builders import build_all
+from tests.example_parsers import example_parser
+
+lines = ['Orange at 8pm', 'Crazy 2pm Green', 'Green 11 am, Orange 3pm', 'nothing']
+
+
+def clock(H=None, M=None):
+    return {'H': H, 'M': M}
+
+
+def parse_lines(parse):
+    return [parse(line) for line in lines]
+
+
+class TestPickle(TestCase):
+
+    def assertSurvivesPickling(self, parse):
+        self.assertEqual(parse_lines(pickle.loads(pickle.dumps(parse))), parse_lines(parse))
+
+    def test_parser_types(self):
+        for parser_type in [reparse.basic_parser, reparse.combined_parser, reparse.alt_parser]:
+            self.assertSurvivesPickling(example_parser('colortime', parser_type=parser_type))
+
+    def test_parser_type_runs_once(self):
+        calls = []
+
+        def counted(patterns):
+            calls.append(patterns)
+            return reparse.basic_parser(patterns)
+        example_parser('colortime', parser_type=counted)
+        self.assertEqual(len(calls), 1)
+
+    def test_compiled_and_memoized(self):
+        self.assertSurvivesPickling(example_parser('colortime', compiled=True, line_cache_size=10))
+        restored = pickle.loads(pickle.dumps(example_parser('colortime', compiled=True)))
+        self.assertTrue(all(hasattr(pattern.plan, 'source') for pattern in restored.patterns))
+
+    def test_dead_captures(self):
+        # the second H overwrites the first, whose capture is dropped
+        for compiled in (False, True):
+            parse = reparse.parser(
+                patterns={'At': {'Pattern': r'at \s <Time>', 'Order': 1}},
+                expressions={'Time': {'Time': {'Expression': r'(\d\d):(\d\d)(?::(\d\d))?', 'Groups': ['H', 'M', 'H']}}},
+                functions={'Time': clock}, compiled=compiled,
+            )
+            expected = parse('at 10:20:30')
+            self.assertEqual(expected, [{'H': [{'H': '30', 'M': '20'}], 'M': None}])
+            self.assertEqual(pickle.loads(pickle.dumps(parse))('at 10:20:30'), expected)
+
+    def test_built_patterns(self):
+        patterns = build_all(
+            {'Id': {'Pattern': 'id=<Digits>', 'Order': 1}},
+            {'Digits': {'Digits': {'Expression': r'(\d+)', 'Groups': ['Value']}}},
+            {'Value': int},
+        )
+        restored = pickle.loads(pickle.dumps(patterns))
+        self.assertEqual([p.findall('id=4 id=55') for p in restored], [[[4], [55]]])
+        self.assertEqual(restored[0].build_full_tree(), patterns[0].build_full_tree())
+
+    def test_parser_class(self):
+        parser = reparse.Parser(reparse.SimpleExpression('n', r'(\d+)', int), line_cache_size=10)
+        parser('a 1')
+        self.assertEqual(pickle.loads(pickle.dumps(parser))('b 2 3'), {'n': [2, 3]})
+
+    def test_spawned_workers(self):
+        parse = example_parser('colortime')
+        with ProcessPoolExecutor(1, multiprocessing.get_context('spawn')) as pool:
+            self.assertEqual(pool.submit(parse_lines, parse).result(), parse_lines(parse))
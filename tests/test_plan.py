@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+from reparse.expression import Expression
+from reparse.plan import Plan
+from tests.example_parsers import example_patterns
+
+
+def nested_run(expression, matches):
+    plan, expression.plan = expression.plan, None
+    try:
+        return expression.run(matches)
+    finally:
+        expression.plan = plan
+
+
+class TestPlan(TestCase):
+
+    def assertPlanMatchesTree(self, patterns, lines):
+        ran = 0
+        for pattern in patterns:
+            self.assertIsInstance(pattern.plan, Plan)
+            for line in lines:
+                for match in pattern.pattern.finditer(line):
+                    groups = tuple('' if g is None else g for g in match.groups())
+                    self.assertEqual(pattern.run(groups), nested_run(pattern, groups))
+                    ran += 1
+        self.assertTrue(ran)
+
+    def test_phone(self):
+        self.assertPlanMatchesTree(example_patterns('phone'), [
+            '+974-584-5656', 'Fax: +000-000-0000', 'call +323-343-3453 now', '974-584-5656',
+        ])
+
+    def test_colortime(self):
+        self.assertPlanMatchesTree(example_patterns('colortime'), [
+            'Orange at 8pm', 'Crazy 2pm Green', 'Green 11 am, Orange 3pm', 'nothing',
+        ])
+
+    def test_children_only_see_their_slice(self):
+        # the child claims three groups but its parent only gives it two
+        child = Expression('', [list, list], [2, 1], tuple)
+        parent = Expression('', [child.run, list], [2, 1], tuple)
+        matches = ('a', 'b', 'c')
+        self.assertEqual(Plan(parent)(matches), parent.run(matches))
+        self.assertEqual(Plan(parent)(matches), ((['a', 'b'], []), ['c']))
+
+    def test_expression_without_groups(self):
+        self.assertEqual(Plan(Expression('a', [], [], len))(()), 0)
@@ -0,0 +1,68 @@
+import itertools
+from unittest import TestCase
+
+from reparse import Parser, SimpleExpression, basic_parser
+from reparse.builders import build_all
+from reparse.prefilter import LiteralIndex, required_literals
+
+
+class TestRequiredLiterals(TestCase):
+
+    def test_optional_parts_are_not_required(self):
+        self.assertEqual(required_literals(r'a?b*(c|d)(?:ef)?'), [])
+
+    def test_repeated_groups_are_required(self):
+        self.assertEqual(required_literals(r'(?:ab)+x{2}'), [('ab', False), ('x', False)])
+
+    def test_scoped_case_flags(self):
+        self.assertEqual(required_literals(r'(?i:ab)cd'), [('ab', True), ('cd', False)])
+
+    def test_unparsable_regex_has_no_literals(self):
+        self.assertEqual(required_literals(r'\p{L}+'), [])
+
+    def test_regex_only_syntax_has_no_literals(self):
+        self.assertEqual(required_literals(r'([[:alpha:]]+)'), [])
+        self.assertEqual(required_literals(r'(?:fax){e<=1}'), [])
+        self.assertEqual(required_literals(r'[[a-z]--[aeiou]]x'), [])
+
+    def test_posix_classes_are_not_filtered_out(self):
+        patterns = build_all(
+            {'Word': {'Pattern': '<Word>', 'Order': 1}},
+            {'Word': {'Word': {'Expression': r'([[:alpha:]]+)', 'Groups': ['Word']}}},
+            {'Word': lambda Word=None: Word},
+        )
+        self.assertTrue(patterns[0].findall('hello'))
+        self.assertEqual(basic_parser(patterns)('hello'), patterns[0].findall('hello'))
+
+
+class TestLiteralIndex(TestCase):
+
+    expressions = [
+        SimpleExpression('fax', r'Fax:(\d+)', int),
+        SimpleExpression('fa', r'Fa(\d)', int),
+        SimpleExpression('x', r'(?i)x(\d)', int),
+        SimpleExpression('number', r'(\d+)', int),
+        SimpleExpression('nested', r'ax:(\d)', int),
+    ]
+
+    def test_candidates_cover_every_matching_expression(self):
+        index = LiteralIndex(self.expressions)
+        for chars in itertools.product('Fax:1X', repeat=4):
+            line = ''.join(chars)
+            matching = [e for e in self.expressions if e.pattern.search(line)]
+            candidates = index.candidates(line)
+            self.assertTrue(set(matching) <= set(candidates), line)
+            self.assertEqual(candidates, [e for e in self.expressions if e in candidates])
+
+    def test_expressions_without_literals_are_always_candidates(self):
+        index = LiteralIndex(self.expressions)
+        self.assertEqual([e.name for e in index.candidates('nothing')], ['number'])
+
+    def test_parser_skips_expressions_without_their_literal(self):
+        calls = []
+        parser = Parser(
+            SimpleExpression('fax', r'Fax:(\d+)', lambda n: calls.append(n)),
+            SimpleExpression('number', r'(\d+)', int),
+        )
+        self.assertEqual(parser.line('call 555'), {'number': 555})
+        self.assertEqual(calls, [])
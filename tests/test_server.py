@@ -0,0 +1,124 @@
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import TestCase
+
+import reparse
+from reparse.server import Client, ParseServer, ServerError, _send
+from tests.example_parsers import example_functions_module, example_parser, example_paths, examples
+
+colortime = example_paths('colortime')
+lines = ['Orange at 8pm', 'Crazy 2pm Green', 'nothing'] * 5
+
+
+class TestServer(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.directory, 'reparse.sock')
+        cls.parse = example_parser('colortime')
+        cls.server = ParseServer(cls.path, {
+            'colortime': cls.parse,
+            'numbers': reparse.Parser(reparse.SimpleExpression('n', r'(\d+)', int)),
+        }, workers=2)
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        shutil.rmtree(cls.directory)
+
+    def test_results_are_the_parsers(self):
+        with Client(self.path, 'colortime', batch_size=4) as client:
+            self.assertEqual(client.parse_many(lines), [self.parse(line) for line in lines])
+            self.assertEqual(client('Green at 1am'), self.parse('Green at 1am'))
+
+    def test_json(self):
+        with Client(self.path, 'numbers', format='json') as client:
+            self.assertEqual(client.parse_many(['a 1', 'b', '2 3']), [{'n': 1}, {}, {'n': [2, 3]}])
+            self.assertEqual(client.parse_many([]), [])
+
+    def test_errors(self):
+        with Client(self.path, 'nope') as client:
+            self.assertRaises(ServerError, client, 'a 1')
+        with Client(self.path, 'colortime') as client:
+            self.assertRaises(ServerError, client, 1)
+            self.assertEqual(client('still Green'), self.parse('still Green'))
+
+    def test_stop_removes_the_socket(self):
+        path = os.path.join(self.directory, 'other.sock')
+        server = ParseServer(path, {'numbers': reparse.Parser()}, workers=1)
+        server.start()
+        server.stop()
+        self.assertFalse(os.path.exists(path))
+
+    def test_workers_survive_clients_that_leave_early(self):
+        path = os.path.join(self.directory, 'single.sock')
+        server = ParseServer(path, {'colortime': self.parse}, workers=1)
+        server.start()
+        try:
+            for _ in range(3):
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.connect(path)
+                _send(sock, json.dumps({'parser': 'colortime', 'lines': lines * 200}).encode('utf-8'))
+                sock.close()
+            with Client(path, 'colortime', timeout=10) as client:
+                self.assertEqual(client('Orange at 8pm'), self.parse('Orange at 8pm'))
+        finally:
+            server.stop()
+
+    def test_client_times_out(self):
+        path = os.path.join(self.directory, 'silent.sock')
+        silent = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        silent.bind(path)
+        silent.listen(1)
+        try:
+            with Client(path, 'colortime', timeout=0.1) as client:
+                self.assertRaises(socket.timeout, client, 'Orange at 8pm')
+                self.assertIsNone(client._socket)
+        finally:
+            silent.close()
+            os.unlink(path)
+
+    def test_other_files_are_left_alone(self):
+        path = os.path.join(self.directory, 'not-a-socket')
+        with open(path, 'w') as f:
+            f.write('keep me')
+        server = ParseServer(path, {'numbers': reparse.Parser()}, workers=1)
+        self.assertRaises(ValueError, server.start)
+        with open(path) as f:
+            self.assertEqual(f.read(), 'keep me')
+
+
+class TestServerProcess(TestCase):
+
+    def test_serves_until_terminated(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'reparse.sock')
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'reparse.server', path, '--workers', '1',
+             '--parser', 'colortime', colortime[0], colortime[1], example_functions_module('colortime')],
+            cwd=os.path.dirname(examples), env=dict(os.environ, PYTHONPATH=os.path.dirname(examples)),
+        )
+        try:
+            for _ in range(200):
+                if os.path.exists(path):
+                    break
+                time.sleep(0.05)
+            with Client(path, 'colortime', format='json') as client:
+                self.assertEqual(client('Orange at 8pm'), [['Orange', '20:00:00']])
+            process.send_signal(signal.SIGTERM)
+            self.assertEqual(process.wait(10), 0)
+            self.assertFalse(os.path.exists(path))
+        finally:
+            if process.poll() is None:
+                process.terminate()
+                process.wait(10)
+            shutil.rmtree(directory)
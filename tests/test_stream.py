@@ -0,0 +1,68 @@
+import io
+from unittest import TestCase
+
+from reparse.builders import build_all
+from reparse.stream import StreamScanner, iter_chunks, scan_stream
+
+text = (
+    "order 17 shipped\nto: Main Street\ntotal:\n  1234 EUR, order 5 total: 99 USD "
+    "and a total:    \n\n 7 GBP, order 123456 shipped"
+)
+
+
+def build(**extra):
+    return build_all(
+        dict({
+            'Total': {'Pattern': r'total:\s+<Amount>', 'Order': 2},
+            'Order': {'Pattern': r'order\s+<Number>', 'Order': 1},
+        }, **extra),
+        {
+            'Number': {'Number': {'Expression': r'(\d+)', 'Groups': ['Value']}},
+            'Amount': {'Amount': {'Expression': r'(\d+)\s+(EUR|USD|GBP)', 'Groups': ['Value', 'Currency']}},
+        },
+        {'Value': int},
+    )
+
+
+class TestStreamScanner(TestCase):
+
+    def setUp(self):
+        self.patterns = build()
+        self.expected = list(scan_stream(self.patterns, [text]))
+
+    def test_whole_text(self):
+        self.assertEqual([(start, end, name) for start, end, name, _ in self.expected], [
+            (0, 8, 'Order'), (33, 50, 'Total'), (52, 59, 'Order'), (60, 73, 'Total'), (80, 98, 'Total'),
+            (100, 112, 'Order'),
+        ])
+        for start, end, _, _ in self.expected:
+            self.assertTrue(text[start:end].startswith(('order', 'total')))
+
+    def test_every_chunk_size(self):
+        for chunk_size in range(1, 40):
+            chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+            self.assertEqual(list(scan_stream(self.patterns, chunks)), self.expected, chunk_size)
+
+    def test_longer_branch_waits_for_more(self):
+        # 'order 5' is settled only once it's clear no 'total' follows the 5
+        scanner = StreamScanner(self.patterns)
+        self.assertEqual(scanner.feed('order 12'), [])
+        self.assertEqual(scanner.feed('3 and'), [(0, 9, 'Order', [[123]])])
+        self.assertEqual(scanner.close(), [])
+
+    def test_carry_is_bounded(self):
+        scanner = StreamScanner(self.patterns, max_carry=10)
+        scanner.feed('total:' + ' ' * 100)
+        self.assertLessEqual(len(scanner._carry), 11)
+        self.assertEqual(scanner.feed('1 EUR order 2 '), [(112, 119, 'Order', [[2]])])
+
+    def test_files(self):
+        self.assertEqual(list(scan_stream(self.patterns, iter_chunks(io.StringIO(text), 16))), self.expected)
+
+    def test_re_engine_is_refused(self):
+        patterns = build_all(
+            {'Id': {'Pattern': 'id=<Digits>', 'Order': 1}},
+            {'Digits': {'Digits': {'Expression': r'(\d+)', 'Groups': ['Value']}}},
+            {'Value': int}, engine='re',
+        )
+        self.assertRaises(ValueError, StreamScanner, patterns)
@@ -0,0 +1,43 @@
+import threading
+from unittest import TestCase
+
+import reparse
+from reparse import Parser, SimpleExpression
+from reparse.builders import build_all
+from reparse.engines import ConcurrentPattern, get_engine
+from reparse.threads import compile_all, parse_many
+
+expressions = {'Size': {'Size': {'Expression': r'(\d+) \s? (k|m)?(b)', 'Groups': ['Amount']}}}
+patterns = {'Size': {'Pattern': '<Size>', 'Order': 1}}
+
+
+class TestThreads(TestCase):
+
+    def test_results_keep_line_order(self):
+        parse = reparse.basic_parser(compile_all(build_all(patterns, expressions, {}, 'regex-concurrent')))
+        lines = ['{} kb'.format(i) if i % 3 else 'nothing' for i in range(1000)]
+        self.assertEqual(parse_many(parse, lines, workers=4, batch_size=7), [parse(line) for line in lines])
+
+    def test_concurrent_engine(self):
+        self.assertIsInstance(get_engine('regex-concurrent').compile(r'(\d+)'), ConcurrentPattern)
+        parser = Parser(SimpleExpression('n', r'(\d+)', int), engine='regex-concurrent')
+        self.assertEqual(parser.parse_many(['1', 'x', '2 3'], workers=3), [{'n': 1}, {}, {'n': [2, 3]}])
+
+    def test_first_compile_is_safe_across_threads(self):
+        # compiling also drops dead captures and remaps the plan: every
+        # thread has to see the result of doing that exactly once
+        for _ in range(20):
+            pattern = build_all(patterns, expressions, {})[0]
+            barrier = threading.Barrier(8)
+            results = []
+
+            def parse():
+                barrier.wait()
+                results.append(pattern.findall('12 kb, 3b'))
+
+            threads = [threading.Thread(target=parse) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(results, [[['12'], ['3']]] * 8)
@@ -0,0 +1,55 @@
+import random
+from functools import reduce
+from unittest import TestCase
+
+from reparse.util import overlapping, remove_lower_overlapping, remove_overlapping
+
+
+def random_groups(rng, groups, matches, single_overlaps=False):
+    """Lists of non-overlapping ``(name, start, end)``, like ``Expression.scan`` output."""
+    output = []
+    kept = []
+    for g in range(groups):
+        group = []
+        position = rng.randint(0, 5)
+        for m in range(matches):
+            start = position + rng.randint(0, 6)
+            end = start + rng.randint(1, 6)
+            position = end
+            if single_overlaps and sum(overlapping(s, e, start, end) for _, s, e in kept) > 1:
+                continue
+            group.append(('{}.{}'.format(g, m), start, end))
+        if single_overlaps:
+            kept = reduce(remove_lower_overlapping, [group], list(kept))
+        output.append(group)
+    return output
+
+
+class TestRemoveOverlapping(TestCase):
+
+    def test_same_as_remove_lower_overlapping(self):
+        """Where each match overlaps at most one kept match the old fold is exact."""
+        rng = random.Random(7)
+        for _ in range(300):
+            groups = random_groups(rng, 4, 6, single_overlaps=True)
+            expected = reduce(remove_lower_overlapping, [list(g) for g in groups], [])
+            self.assertEqual(remove_overlapping(groups), expected)
+
+    def test_keeps_exactly_the_matches_no_later_group_overlaps(self):
+        rng = random.Random(11)
+        for _ in range(300):
+            groups = random_groups(rng, 5, 8)
+            expected = {
+                match
+                for i, group in enumerate(groups) for match in group
+                if not any(overlapping(match[1], match[2], s, e) for later in groups[i + 1:] for _, s, e in later)
+            }
+            result = remove_overlapping(groups)
+            self.assertEqual(set(result), expected)
+            self.assertEqual(len(result), len(expected))
+
+    def test_many_matches(self):
+        low = [('low', i, i + 2) for i in range(0, 60000, 3)]
+        high = [('high', i, i + 1) for i in range(1, 60000, 6)]
+        result = remove_overlapping([low, high])
+        self.assertEqual(len(result), 20000)